@@ -1,6 +1,7 @@
 from PIL import Image
 from typing import List, Tuple
 import math
+import numpy as np
 
 def _get_palette_rgb(img: Image.Image) -> List[Tuple[int,int,int]]:
     assert img.mode == "P", "Нужно палитровое изображение 8 bpp"
@@ -46,6 +47,17 @@ def _nearest_pos_with_lsb(target_bit: int, pos: int, n: int) -> int:
             # не найдено — возвращаем pos (не должно случаться при n>=2)
             return pos
 
+def _build_nearest_table(orig_to_pos, pos_to_orig, n: int) -> np.ndarray:
+    """
+    Таблица 256 x 2: table[orig, bit] = pos_to_orig[_nearest_pos_with_lsb(bit, pos, n)].
+    Считается один раз на палитру вместо поиска на каждый пиксель.
+    """
+    table = np.tile(np.arange(256, dtype=np.uint8)[:, None], (1, 2))
+    for orig, pos in orig_to_pos.items():
+        for bit in (0, 1):
+            table[orig, bit] = pos_to_orig[_nearest_pos_with_lsb(bit, pos, n)]
+    return table
+
 def embed_palette_lsb(
     src_path: str,
     dst_path: str,
@@ -60,39 +72,22 @@ def embed_palette_lsb(
     palette = _get_palette_rgb(img)
     indexed, orig_to_pos, pos_to_orig = _build_sorted_tables(palette)
     w, h = img.size
-    pixels = img.load()
 
     # сформировать последовательность бит
-    bits: List[int] = []
+    data = bitstream
     if use_header_len:
-        total_bits = len(bitstream)
-        header = total_bits.to_bytes(4, "big")
-        for byte in header:
-            for i in range(8)[::-1]:
-                bits.append((byte >> i) & 1)
-    for b in bitstream:
-        for i in range(8)[::-1]:
-            bits.append((b >> i) & 1)
+        data = len(bitstream).to_bytes(4, "big") + bitstream
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
 
     capacity = w * h
     if len(bits) > capacity:
         raise ValueError(f"Недостаточная емкость: нужно {len(bits)} пикс., есть {capacity}")
 
     n = len(indexed)  # обычно 256
-    k = 0
-    for y in range(h):
-        for x in range(w):
-            if k >= len(bits):
-                break
-            orig_idx = pixels[x, y]
-            pos = orig_to_pos[orig_idx]
-            target_bit = bits[k]
-            new_pos = _nearest_pos_with_lsb(target_bit, pos, n)
-            new_orig = pos_to_orig[new_pos]
-            pixels[x, y] = new_orig
-            k += 1
-        if k >= len(bits):
-            break
+    table = _build_nearest_table(orig_to_pos, pos_to_orig, n)
+    flat = np.array(img).reshape(-1)
+    flat[:len(bits)] = table[flat[:len(bits)], bits]
+    img.frombytes(flat.tobytes())
 
     img.save(dst_path)
 
@@ -1,6 +1,7 @@
 from ast import List
 from PIL import Image
-from utils import display_palette, _get_palette_rgb, _build_sorted_tables, _weight, _nearest_pos_with_lsb
+import numpy as np
+from utils import display_palette, _get_palette_rgb, _build_sorted_tables, _weight, _build_nearest_table
 
 stringa = "На краю дороги стоял дуб. Вероятно, в десять раз старше берез, составлявших лес, он был в десять раз толще, и в два раза выше каждой березы. Это был огромный, в два обхвата дуб, с обломанными, давно, видно, суками и с обломанной корой, заросшей старыми болячками. С огромными своими неуклюже, несимметрично растопыренными корявыми руками и пальцами, он старым, сердитым и презрительным уродом стоял между улыбающимися березами. Только он один не хотел подчиняться обаянию весны и не хотел видеть ни весны, ни солнца. Князь Андрей несколько раз оглянулся на этот дуб, проезжая по лесу, как будто он чего-то ждал от него. Цветы и трава были и под дубом, но он все так же, хмурясь, неподвижно, уродливо и упорно, стоял посреди их. «Да, он прав, тысячу раз прав этот дуб, — думал князь Андрей, — пускай другие, молодые, вновь поддаются на этот обман, а мы знаем жизнь, — наша жизнь кончена!» Целый новый ряд мыслей безнадежных, но грустно-приятных в связи с этим дубом возник в душе князя Андрея. Во время этого путешествия он как будто вновь обдумал всю свою жизнь и пришел к тому же прежнему, успокоительному и безнадежному, заключению, что ему начинать ничего было не надо, что он должен доживать свою жизнь, не делая зла, не тревожась и ничего не желая."
 
@@ -21,22 +22,11 @@ def embed_palette(source_path, dst_path, bits):
     pixels = image.load()
     bits = str_to_bit_array(stringa)
     print(len(bits))
-    w, h = image.size
-    pixels = image.load()
-
-    n = 256
-    k = 0
-    for y in range(h):
-        for x in range(w):
-            if k >= len(bits): break
-            orig_idx = pixels[x, y]
-            pos = orig_to_pos[orig_idx]
-            target = bits[k]
-            new_pos = _nearest_pos_with_lsb(target, pos_to_orig ,pos, n, palette)
-            pixels[x, y] = new_pos
-            k += 1
-            
-        if k >= len(bits): break
+    table = _build_nearest_table(palette, orig_to_pos, pos_to_orig)
+    flat = np.array(image).reshape(-1)
+    k = min(len(bits), flat.size)
+    flat[:k] = table[flat[:k], np.asarray(bits[:k], dtype=np.uint8)]
+    image.frombytes(flat.tobytes())
         
     
     image.save(dst_path)
@@ -56,12 +46,9 @@ def extract_palette(img_path, bit_len):
         if len(bits) >= need: break
     return bits
 
-secret = "Hello, Bro"
-print(secret)
-embed_palette("OIPBPM.bmp", "result.bmp", secret)
-result_b = extract_palette("result.bmp", len(secret)*8)
-print(result_b)
-
-
-
-
+if __name__ == "__main__":
+    secret = "Hello, Bro"
+    print(secret)
+    embed_palette("OIPBPM.bmp", "result.bmp", secret)
+    result_b = extract_palette("result.bmp", len(secret)*8)
+    print(result_b)
@@ -1,5 +1,6 @@
 from PIL import Image
 import math
+import numpy as np
 
 def display_palette(palette, save_path):
     result_palette = []
@@ -39,29 +40,66 @@ def _build_sorted_tables(palette):
     pos_to_orig = {i:orig for i,(orig,_) in enumerate(indexed)}
     return indexed, orig_to_pos, pos_to_orig   
 
-def _nearest_pos_with_lsb(target_bit, pos_to_orig, pos, n, palette):
-    indexed = list(enumerate(palette))
+def _nearest_pos_with_lsb(target_bit, pos_to_orig, pos, n, palette, weights=None):
+    # weights — заранее посчитанные _weight(palette[i]), чтобы не звать sqrt в цикле
     orig = pos_to_orig[pos]
     if (orig & 1) == target_bit:
         return orig
+    if weights is None:
+        weights = [_weight(c) for c in palette]
+    pos_weight = weights[orig]
     r = 1
     while True:
         dn = pos - r
         up = pos + r
-        orig_dn = pos_to_orig[dn]
-        orig_up = pos_to_orig[up]
-        cand = []
-        pos_weight = _weight(indexed[orig][1])
-        dn_weight = _weight(indexed[orig_dn][1])
-        up_weight = _weight(indexed[orig_up][1])
-        if orig_dn >= 0 and ((orig_dn & 1) == target_bit):
-            cand.append((orig_dn, dn_weight))
-        if orig_up < n and ((orig_up & 1) == target_bit):
-            cand.append((orig_up, up_weight))
-        if cand:
-            minim = min(cand, key=lambda c: abs(c[1] - pos_weight))
-            return minim[0]
-        if orig_dn < 0 and orig_up >= n:
+        if dn < 0 and up >= n:
             return orig
-            
-        r += 1
\ No newline at end of file
+        best = -1
+        best_diff = 0.0
+        # при равной разнице весов выигрывает нижний сосед, как min() по списку [dn, up]
+        if dn >= 0:
+            orig_dn = pos_to_orig[dn]
+            if (orig_dn & 1) == target_bit:
+                best = orig_dn
+                best_diff = abs(weights[orig_dn] - pos_weight)
+        if up < n:
+            orig_up = pos_to_orig[up]
+            if (orig_up & 1) == target_bit:
+                diff = abs(weights[orig_up] - pos_weight)
+                if best < 0 or diff < best_diff:
+                    best = orig_up
+        if best >= 0:
+            return best
+        r += 1
+
+def _build_nearest_table(palette, orig_to_pos=None, pos_to_orig=None):
+    """
+    Таблица 256 x 2: table[orig, bit] — индекс, которым _nearest_pos_with_lsb
+    заменит orig при бите bit. Строится один раз на палитру; индексы вне
+    палитры остаются как есть.
+    """
+    if orig_to_pos is None or pos_to_orig is None:
+        _, orig_to_pos, pos_to_orig = _build_sorted_tables(palette)
+    n = len(palette)
+    weights = [_weight(c) for c in palette]
+    table = np.tile(np.arange(256, dtype=np.uint8)[:, None], (1, 2))
+    for orig, pos in orig_to_pos.items():
+        for bit in (0, 1):
+            table[orig, bit] = _nearest_pos_with_lsb(bit, pos_to_orig, pos, n, palette, weights)
+    return table
+
+def embed_palette_lsb(src_path, dst_path, bits):
+    """
+    Встраивает последовательность бит (по одному на пиксель, в растровом порядке)
+    одной выборкой из таблицы _build_nearest_table — те же индексы, что даёт
+    попиксельный цикл с _nearest_pos_with_lsb.
+    """
+    img = Image.open(src_path).convert("P")
+    table = _build_nearest_table(_get_palette_rgb(img))
+    flat = np.array(img).reshape(-1)
+    bits = np.asarray(bits, dtype=np.uint8)
+    if len(bits) > flat.size:
+        raise ValueError(f"Недостаточная емкость: нужно {len(bits)} пикс., есть {flat.size}")
+    flat[:len(bits)] = table[flat[:len(bits)], bits]
+    img.frombytes(flat.tobytes())
+    img.save(dst_path)
@@ -0,0 +1,61 @@
+"""
+Стеганография в индексах 8-битных палитровых изображений.
+
+Импорт пакета ничего не делает и не тянет Pillow/NumPy: публичные имена
+подгружаются из подмодулей при первом обращении.
+"""
+
+__version__ = "0.1.0"
+
+_EXPORTS = {
+    "embed_palette_lsb": "core",
+    "embed_palette_lsb_nohdr": "core",
+    "extract_palette_lsb": "core",
+    "EmbedResult": "core",
+    "extract_palette_lsb_nohdr": "core",
+    "extract_palette_lsb_to": "core",
+    "iter_extract_palette_lsb": "core",
+    "build_sorted_tables": "core",
+    "STRATEGIES": "core",
+    "DEFAULT_STRATEGY": "core",
+    "embed_rgb_lsb": "rgb",
+    "extract_rgb_lsb": "rgb",
+    "extract_rgb_lsb_to": "rgb",
+    "iter_extract_rgb_lsb": "rgb",
+    "embed_buffer": "buffers",
+    "extract_buffer": "buffers",
+    "make_delta": "delta",
+    "apply_delta": "delta",
+    "estimate": "estimator",
+    "index_histogram": "estimator",
+    "update_palette_lsb_nohdr": "update",
+    "embed_wet_paper": "wetpaper",
+    "extract_wet_paper": "wetpaper",
+    "wet_capacity": "wetpaper",
+    "create_container": "container",
+    "list_streams": "container",
+    "extract_stream": "container",
+    "add_stream": "container",
+    "remove_stream": "container",
+    "ExtractCache": "cache",
+    "Profile": "profiling",
+    "TableStore": "tables",
+    "quantize_paths": "quantize",
+    "build_color_cube": "quantize",
+    "scan_image": "detect",
+    "scan_paths": "detect",
+}
+
+__all__ = sorted(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,127 @@
+"""
+Встраивание и извлечение без файлов: в памяти, для сервисов, которые получают
+изображение запросом и отдают ответом.
+
+Обложка может быть:
+
+- numpy.ndarray — плоскость индексов (uint8) плюс palette; записываемый
+  непрерывный массив меняется на месте и возвращается без копии;
+- PIL.Image — возвращается новое палитровое изображение, исходное не меняется;
+- bytes / bytearray / memoryview — закодированный файл (BMP, PNG, JPEG, ...);
+  возвращаются bytes в том же формате, если он хранит палитровое изображение
+  без потерь, иначе в PNG (или в format).
+"""
+from PIL import Image
+import io
+import time
+import numpy as np
+from .core import (_embed_flat, _embed_result, _iter_payload, _check_bpp, get_palette_rgb, palette_luts,
+                   payload_length, symbols_to_bits, bits_to_bytes, CHUNK_SIZE, STRIP_ROWS,
+                   DEFAULT_STRATEGY)
+from .profiling import Profile, NULL_PROFILE
+
+PALETTE_FORMATS = ("PNG", "BMP", "GIF", "TIFF")  # хранят режим P без потерь
+
+def _output_format(fmt, requested):
+    # формат выбирается до встраивания, чтобы не упасть на save после всей работы
+    if requested is not None:
+        if requested.upper() not in PALETTE_FORMATS:
+            raise ValueError(f"Нужен формат без потерь с палитрой {PALETTE_FORMATS}, а не {requested!r}")
+        return requested.upper()
+    return fmt if fmt in PALETTE_FORMATS else "PNG"
+
+def _as_palette(palette):
+    # список (r, g, b), как у get_palette_rgb, из списка, плоского списка или массива n x 3
+    return [tuple(int(c) for c in rgb) for rgb in np.asarray(palette, dtype=np.uint8).reshape(-1, 3)]
+
+def _open(cover, palette):
+    """(изображение или итоговый массив, палитра, плоскость индексов, тип результата)."""
+    if isinstance(cover, np.ndarray):
+        if palette is None:
+            raise ValueError("Для массива индексов нужна palette")
+        if cover.dtype != np.uint8:
+            raise ValueError(f"Плоскость индексов должна быть uint8, а не {cover.dtype}")
+        out = cover if cover.flags.writeable and cover.flags.c_contiguous else np.array(cover)
+        return out, _as_palette(palette), out.reshape(-1), "array"
+    if isinstance(cover, (bytes, bytearray, memoryview)):
+        img = Image.open(io.BytesIO(cover))
+        kind = "bytes"
+    elif isinstance(cover, Image.Image):
+        img = cover
+        kind = "image"
+    else:
+        raise ValueError(f"Неподдерживаемый тип обложки: {type(cover).__name__}")
+    fmt = img.format
+    img = img.convert("P") if img.mode != "P" else img.copy()
+    img.format = fmt
+    return img, get_palette_rgb(img), np.array(img).reshape(-1), kind
+
+def embed_buffer(cover, payload, palette=None, strategy: str = DEFAULT_STRATEGY,
+                 profile: Profile | None = None, payload_len: int | None = None,
+                 chunk_size: int = CHUNK_SIZE, bits_per_pixel: int = 1, tables=None,
+                 header: bool = True, format: str | None = None, verify: bool = False,
+                 with_result: bool = False):
+    """
+    Как embed_palette_lsb (или embed_palette_lsb_nohdr при header=False), но
+    обложка и результат — в памяти. Возвращает то же, что пришло: массив
+    (тот же объект, если его можно менять на месте), PIL.Image или bytes.
+    verify — как у embed_palette_lsb: при расхождении ValueError. С
+    with_result=True возвращается пара (результат, EmbedResult).
+    """
+    t0 = time.perf_counter()
+    _check_bpp(bits_per_pixel)
+    prof = profile or NULL_PROFILE
+    total = payload_length(payload, payload_len)
+    with prof.stage("open"):
+        img, palette, flat, kind = _open(cover, palette)
+    fmt = _output_format(img.format, format) if kind == "bytes" else None
+    embedded = _embed_flat(flat, palette, payload, total, strategy, prof, chunk_size, header,
+                           bits_per_pixel, tables, verify)
+    if kind == "array":
+        out = img
+    else:
+        with prof.stage("save"):
+            img.frombytes(flat.tobytes())
+            if kind == "image":
+                out = img
+            else:
+                buf = io.BytesIO()
+                img.save(buf, format=fmt)
+                out = buf.getvalue()
+    if with_result:
+        return out, _embed_result(total, embedded, header, bits_per_pixel, t0)
+    return out
+
+def _plane(stego, palette):
+    if isinstance(stego, np.ndarray):
+        if palette is None:
+            raise ValueError("Для массива индексов нужна palette")
+        return _as_palette(palette), stego if stego.ndim == 2 else stego.reshape(1, -1)
+    if isinstance(stego, (bytes, bytearray, memoryview)):
+        stego = Image.open(io.BytesIO(stego))
+    elif not isinstance(stego, Image.Image):
+        raise ValueError(f"Неподдерживаемый тип изображения: {type(stego).__name__}")
+    img = stego.convert("P") if stego.mode != "P" else stego
+    return get_palette_rgb(img), np.asarray(img)
+
+def extract_buffer(stego, palette=None, strategy: str = DEFAULT_STRATEGY,
+                   profile: Profile | None = None, bits_per_pixel: int = 1, tables=None,
+                   bit_len: int | None = None, strip_rows: int = STRIP_ROWS) -> bytes:
+    """
+    Извлекает нагрузку из массива индексов (с palette), PIL.Image или bytes
+    закодированного файла. Без bit_len читается заголовок и проверяется CRC,
+    как у extract_palette_lsb; с bit_len — ровно столько бит без заголовка.
+    """
+    prof = profile or NULL_PROFILE
+    with prof.stage("open"):
+        palette, plane = _plane(stego, palette)
+    with prof.stage("tables"):
+        parity, _ = palette_luts(palette, strategy, bits_per_pixel, tables, flip=False)
+    if bit_len is not None:
+        need = -(-bit_len // bits_per_pixel)
+        with prof.stage("pixels"):
+            symbols = parity[plane.reshape(-1)[:need]]
+        prof.count("pixels_visited", len(symbols))
+        return bits_to_bytes(symbols_to_bits(symbols, bits_per_pixel)[:bit_len])
+    strips = (plane[y0:y0 + strip_rows].reshape(-1) for y0 in range(0, len(plane), strip_rows))
+    return b"".join(_iter_payload(strips, parity, plane.size * bits_per_pixel, bits_per_pixel, prof))
@@ -0,0 +1,119 @@
+from PIL import Image
+import hashlib
+import os
+import numpy as np
+from .core import (get_palette_rgb, build_sorted_tables, build_parity_lut, palette_digest,
+                   bits_to_bytes, DEFAULT_STRATEGY)
+
+def evict_lru(root: str, max_bytes: int, suffix: str):
+    """Удаляет самые давно использованные (по mtime) файлы *suffix, пока каталог больше max_bytes."""
+    entries = []
+    total = 0
+    for e in os.scandir(root):
+        if not e.name.endswith(suffix):
+            continue
+        try:
+            st = e.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime_ns, st.st_size, e.path))
+        total += st.st_size
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+class ExtractCache:
+    """
+    Дисковый кэш результатов извлечения с вытеснением LRU по суммарному размеру.
+
+    Ключ результата — (идентичность файла, стратегия, диапазон бит). Идентичность
+    файла — inode+mtime+size (дёшево) или sha256 содержимого (use_digest=True,
+    переживает копирование файла). Отдельно кэшируются таблицы чётности на
+    палитру, чтобы промах по новому файлу со знакомой палитрой не пересобирал
+    build_sorted_tables. Время последнего доступа хранится в mtime записей.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 64 * 1024 * 1024, use_digest: bool = False):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.use_digest = use_digest
+        os.makedirs(root, exist_ok=True)
+
+    def _file_id(self, path):
+        if self.use_digest:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            return "sha256:" + h.hexdigest()
+        st = os.stat(path)
+        return f"stat:{st.st_dev}:{st.st_ino}:{st.st_mtime_ns}:{st.st_size}"
+
+    def _entry(self, kind, *key):
+        name = hashlib.sha1("|".join(map(str, key)).encode()).hexdigest()
+        return os.path.join(self.root, f"{kind}-{name}.bin")
+
+    def _get(self, entry):
+        try:
+            with open(entry, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(entry)  # отмечаем использование для LRU
+        except OSError:
+            pass  # запись уже вытеснена или кэш только для чтения
+        return data
+
+    def _put(self, entry, data: bytes):
+        # в кэш только для чтения не пишем: результат просто не сохраняется
+        tmp = f"{entry}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, entry)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        self._evict()
+
+    def _evict(self):
+        evict_lru(self.root, self.max_bytes, ".bin")
+
+    def parity_lut(self, palette, strategy: str = DEFAULT_STRATEGY) -> np.ndarray:
+        entry = self._entry("lut", palette_digest(palette), strategy)
+        data = self._get(entry)
+        if data is not None:
+            return np.frombuffer(data, dtype=np.uint8)
+        _, orig_to_pos, _ = build_sorted_tables(palette, strategy)
+        lut = build_parity_lut(orig_to_pos)
+        self._put(entry, lut.tobytes())
+        return lut
+
+    def extract_nohdr(self, stego_path: str, bit_len: int, strategy: str = DEFAULT_STRATEGY,
+                      bit_offset: int = 0) -> bytes:
+        """То же, что extract_palette_lsb_nohdr, начиная с бита bit_offset, но через кэш."""
+        entry = self._entry("payload", self._file_id(stego_path), strategy, bit_offset, bit_len)
+        data = self._get(entry)
+        if data is not None:
+            return data
+        img = Image.open(stego_path).convert("P")
+        lut = self.parity_lut(get_palette_rgb(img), strategy)
+        indices = np.asarray(img).reshape(-1)[bit_offset:bit_offset + bit_len]
+        data = bits_to_bytes(lut[indices])
+        self._put(entry, data)
+        return data
+
+    def clear(self):
+        for e in os.scandir(self.root):
+            if e.name.endswith(".bin"):
+                os.remove(e.path)
@@ -0,0 +1,373 @@
+"""
+Командная строка: tegan embed | extract | inspect | bench | scan.
+
+Pillow и NumPy импортируются только внутри подкоманд, поэтому `tegan --help`
+и разбор аргументов не платят за их загрузку.
+"""
+import argparse
+import json
+import os
+import stat
+import sys
+import tempfile
+
+from . import __version__
+
+def _strategy_kwargs(args):
+    kwargs = {} if args.strategy is None else {"strategy": args.strategy}
+    if getattr(args, "bits_per_pixel", None) is not None:
+        kwargs["bits_per_pixel"] = args.bits_per_pixel
+    if getattr(args, "tables", None):
+        kwargs["tables"] = _table_store(args)
+    return kwargs
+
+def _table_store(args):
+    if not args.tables:
+        return None
+    from .tables import TableStore
+    return TableStore(args.tables)
+
+def _profile(args):
+    if not (args.profile_json or args.prometheus):
+        return None
+    from .profiling import Profile
+    return Profile()
+
+def _export(profile, args):
+    if profile is None:
+        return
+    if args.profile_json:
+        profile.to_json(args.profile_json)
+    if args.prometheus:
+        profile.to_prometheus(args.prometheus)
+
+def _rgb_embed(cover, output, payload, lsb_bits, profile=None, payload_len=None, **kwargs):
+    from .rgb import embed_rgb_lsb
+
+    if kwargs:
+        raise ValueError(f"--rgb-lsb несовместим с {', '.join(sorted(kwargs))}")
+    embed_rgb_lsb(cover, output, payload, lsb_bits, profile=profile, payload_len=payload_len)
+
+def _wet_embed(cover, output, payload, max_cost, key, profile=None, payload_len=None,
+               bits_per_pixel=None, **kwargs):
+    from .wetpaper import embed_wet_paper
+
+    if bits_per_pixel not in (None, 1):
+        raise ValueError("--max-cost работает только с одним битом на пиксель")
+    embed_wet_paper(cover, output, payload, max_cost, key=key, profile=profile, payload_len=payload_len,
+                    **kwargs)
+
+def cmd_embed(args):
+    from functools import partial
+    from .core import embed_palette_lsb, embed_palette_lsb_nohdr
+
+    if args.max_cost is not None:
+        if args.no_header or args.rgb_lsb:
+            raise ValueError("--max-cost несовместим с --no-header и --rgb-lsb")
+        embed = partial(_wet_embed, max_cost=args.max_cost, key=args.key)
+    elif args.rgb_lsb:
+        if args.no_header:
+            raise ValueError("Режим --rgb-lsb всегда пишет заголовок")
+        embed = partial(_rgb_embed, lsb_bits=args.rgb_lsb)
+    else:
+        embed = embed_palette_lsb_nohdr if args.no_header else embed_palette_lsb
+    profile = _profile(args)
+    kwargs = _strategy_kwargs(args)
+    if args.verify:
+        if args.max_cost is not None or args.rgb_lsb:
+            raise ValueError("--verify есть только у палитрового режима")
+        kwargs["verify"] = True
+    if args.payload == "-":
+        src = sys.stdin.buffer
+        payload_len = args.length
+        if payload_len is None and not stat.S_ISREG(os.fstat(src.fileno()).st_mode):
+            # длина канала заранее неизвестна — читаем его целиком
+            src = src.read()
+        embed(args.cover, args.output, src, profile=profile, payload_len=payload_len, **kwargs)
+    else:
+        with open(args.payload, "rb") as src:
+            embed(args.cover, args.output, src, profile=profile, payload_len=args.length, **kwargs)
+    _export(profile, args)
+    return 0
+
+def _output_mode(path):
+    # права заменяемого файла, а для нового — как у open(): 0666 без umask
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+def cmd_extract(args):
+    from .core import extract_palette_lsb_nohdr, extract_palette_lsb_to
+
+    profile = _profile(args)
+    if args.output == "-":
+        sink = sys.stdout.buffer
+    else:
+        # пишем во временный файл рядом и подменяем только после успеха,
+        # чтобы ошибка извлечения не оставила пустой или обрезанный файл
+        fd, tmp = tempfile.mkstemp(prefix=".tegan-", dir=os.path.dirname(os.path.abspath(args.output)))
+        sink = os.fdopen(fd, "wb")
+        os.chmod(tmp, _output_mode(args.output))  # mkstemp создаёт файл с 0600
+    try:
+        if args.wet_paper:
+            from .wetpaper import extract_wet_paper
+            kwargs = _strategy_kwargs(args)
+            if kwargs.pop("bits_per_pixel", 1) != 1:
+                raise ValueError("--wet-paper работает только с одним битом на пиксель")
+            sink.write(extract_wet_paper(args.stego, key=args.key, profile=profile, **kwargs))
+        elif args.rgb_lsb:
+            from .rgb import extract_rgb_lsb_to
+            extract_rgb_lsb_to(args.stego, sink, args.rgb_lsb, profile=profile)
+        elif args.no_header:
+            if args.bits is None:
+                raise ValueError("Без заголовка нужен --bits")
+            sink.write(extract_palette_lsb_nohdr(args.stego, args.bits, profile=profile,
+                                                 **_strategy_kwargs(args)))
+        else:
+            extract_palette_lsb_to(args.stego, sink, profile=profile, **_strategy_kwargs(args))
+    except BaseException:
+        if sink is not sys.stdout.buffer:
+            sink.close()
+            os.unlink(tmp)
+        raise
+    if sink is not sys.stdout.buffer:
+        sink.close()
+        os.replace(tmp, args.output)
+    _export(profile, args)
+    return 0
+
+def cmd_inspect(args):
+    from PIL import Image
+    from .core import HEADER_BITS, peek_header
+
+    with Image.open(args.image) as img:
+        info = {"format": img.format, "mode": img.mode, "width": img.width, "height": img.height}
+    bits_per_pixel = args.bits_per_pixel or 1
+    info["capacity_bits"] = info["width"] * info["height"] * bits_per_pixel
+    header = peek_header(args.image, **_strategy_kwargs(args))
+    if header is not None:
+        info["header"] = {"payload_bytes": header[0], "crc32": f"{header[1]:08x}",
+                          "pixels_used": (HEADER_BITS + header[0] * 8) // bits_per_pixel}
+    if args.estimate is not None:
+        from .estimator import estimate
+        info["estimate"] = estimate(args.image, args.estimate, **_strategy_kwargs(args))
+    print(json.dumps(info, ensure_ascii=False, indent=2))
+    return 0
+
+def _bench_runs(embed, extract, payload, repeat, distortion=None):
+    import time
+    from .profiling import Profile
+
+    results = []
+    for _ in range(repeat):
+        prof_embed, prof_extract = Profile(), Profile()
+        t0 = time.perf_counter()
+        out = embed(payload, prof_embed)
+        t1 = time.perf_counter()
+        ok = extract(out, prof_extract) == payload
+        t2 = time.perf_counter()
+        result = {
+            "embed_seconds": t1 - t0,
+            "extract_seconds": t2 - t1,
+            "ok": ok,
+            "embed": prof_embed.to_dict(),
+            "extract": prof_extract.to_dict(),
+        }
+        if distortion is not None:
+            result["distortion"] = distortion(out)
+        results.append(result)
+    best = min(results, key=lambda r: r["embed_seconds"] + r["extract_seconds"])
+    return {
+        "embed_mb_per_s": len(payload) / best["embed_seconds"] / 1e6,
+        "extract_mb_per_s": len(payload) / best["extract_seconds"] / 1e6,
+        "ok": all(r["ok"] for r in results),
+        "best": best,
+    }
+
+def cmd_bench(args):
+    from PIL import Image
+    from .core import embed_palette_lsb, extract_palette_lsb, measure_distortion
+
+    payload = os.urandom(args.size)
+    kwargs = _strategy_kwargs(args)
+    bits_per_pixel = args.bits_per_pixel or 1
+    with Image.open(args.cover) as img:
+        pixels = img.width * img.height
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "stego.bmp")
+
+        def embed(data, profile):
+            embed_palette_lsb(args.cover, out, data, profile=profile, **kwargs)
+            return out
+
+        report = {
+            "payload_bytes": args.size,
+            "bits_per_pixel": bits_per_pixel,
+            "capacity_bits": pixels * bits_per_pixel,
+            **_bench_runs(embed, lambda path, profile: extract_palette_lsb(path, profile=profile, **kwargs),
+                          payload, args.repeat, lambda path: measure_distortion(args.cover, path)),
+        }
+        if args.rgb_lsb:
+            from .rgb import embed_rgb_lsb, extract_rgb_lsb
+
+            out_rgb = os.path.join(tmp, "stego24.bmp")
+
+            def embed_rgb(data, profile):
+                embed_rgb_lsb(args.cover, out_rgb, data, args.rgb_lsb, profile=profile)
+                return out_rgb
+
+            rgb = _bench_runs(embed_rgb, lambda path, profile: extract_rgb_lsb(path, args.rgb_lsb, profile),
+                              payload, args.repeat)
+            rgb["lsb_bits"] = args.rgb_lsb
+            rgb["capacity_bits"] = pixels * 3 * args.rgb_lsb
+            rgb["capacity_gain"] = rgb["capacity_bits"] / report["capacity_bits"]
+            rgb["embed_speedup"] = rgb["embed_mb_per_s"] / report["embed_mb_per_s"]
+            rgb["extract_speedup"] = rgb["extract_mb_per_s"] / report["extract_mb_per_s"]
+            report["rgb"] = rgb
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0 if report["ok"] and report.get("rgb", {}).get("ok", True) else 1
+
+def cmd_delta(args):
+    from .delta import make_delta, delta_info
+
+    delta = make_delta(args.cover, args.stego)
+    with open(args.output, "wb") as f:
+        f.write(delta)
+    print(json.dumps(delta_info(delta), ensure_ascii=False, indent=2))
+    return 0
+
+def cmd_apply_delta(args):
+    from .delta import apply_delta
+
+    with open(args.delta, "rb") as f:
+        apply_delta(args.cover, f.read(), args.output)
+    return 0
+
+def cmd_scan(args):
+    from .detect import iter_image_paths, scan_paths
+
+    kwargs = {} if args.strategy is None else {"strategies": [args.strategy]}
+    found = 0
+    for result in scan_paths(iter_image_paths(args.paths), workers=args.workers,
+                             tables=_table_store(args), **kwargs):
+        if args.only_suspicious and not result.get("suspicious"):
+            continue
+        found += bool(result.get("suspicious"))
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+    return 2 if found else 0
+
+def cmd_quantize(args):
+    from .quantize import load_palette, quantize_paths
+
+    failed = 0
+    for result in quantize_paths(args.paths, args.out_dir, load_palette(args.palette), bits=args.cube_bits,
+                                 dither=args.dither, workers=args.workers):
+        failed += "error" in result
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+    return 1 if failed else 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="tegan", description="LSB-стеганография в палитровых изображениях")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def bpp(p):
+        p.add_argument("--bits-per-pixel", type=int, choices=(1, 2),
+                       help="бит нагрузки на пиксель: 1 (pos & 1) или 2 (pos & 3)")
+
+    def rgb(p):
+        p.add_argument("--rgb-lsb", type=int, choices=(1, 2, 4),
+                       help="полноцветный режим: младших бит на канал вместо палитры")
+
+    def tables(p):
+        p.add_argument("--tables", metavar="DIR", help="каталог общего хранилища таблиц палитр")
+
+    def common(p):
+        p.add_argument("--strategy", help="порядок сортировки палитры: luma, rgb или norm")
+        bpp(p)
+        tables(p)
+        rgb(p)
+        p.add_argument("--profile-json", metavar="PATH", help="сохранить таймеры стадий в JSON")
+        p.add_argument("--prometheus", metavar="PATH", help="сохранить метрики для textfile-коллектора")
+
+    p = sub.add_parser("embed", help="встроить нагрузку")
+    p.add_argument("cover")
+    p.add_argument("output")
+    p.add_argument("payload", nargs="?", default="-", help="файл нагрузки или - для stdin")
+    p.add_argument("--length", type=int, help="длина нагрузки в байтах, если её не узнать заранее")
+    p.add_argument("--no-header", action="store_true", help="без заголовка длины и CRC")
+    p.add_argument("--max-cost", type=float, metavar="DE",
+                   help="не трогать пиксели, смена которых дороже DE (ΔE); код мокрой бумаги")
+    p.add_argument("--key", type=int, default=0, help="ключ перестановки для кода мокрой бумаги")
+    p.add_argument("--verify", action="store_true", help="проверить встраивание в памяти до записи файла")
+    common(p)
+    p.set_defaults(func=cmd_embed)
+
+    p = sub.add_parser("extract", help="извлечь нагрузку")
+    p.add_argument("stego")
+    p.add_argument("output", nargs="?", default="-", help="файл или - для stdout")
+    p.add_argument("--no-header", action="store_true", help="без заголовка; нужна --bits")
+    p.add_argument("--bits", type=int, help="число извлекаемых бит в режиме без заголовка")
+    p.add_argument("--wet-paper", action="store_true", help="нагрузка встроена с --max-cost")
+    p.add_argument("--key", type=int, default=0, help="ключ перестановки для кода мокрой бумаги")
+    common(p)
+    p.set_defaults(func=cmd_extract)
+
+    p = sub.add_parser("inspect", help="размеры, ёмкость и заголовок изображения")
+    p.add_argument("image")
+    p.add_argument("--strategy", help="порядок сортировки палитры: luma, rgb или norm")
+    p.add_argument("--estimate", type=int, metavar="BYTES",
+                   help="оценить искажение от нагрузки такой длины, не встраивая")
+    bpp(p)
+    p.set_defaults(func=cmd_inspect)
+
+    p = sub.add_parser("bench", help="замерить встраивание и извлечение на обложке")
+    p.add_argument("cover")
+    p.add_argument("--size", type=int, default=16 * 1024, help="размер случайной нагрузки в байтах")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--strategy", help="порядок сортировки палитры: luma, rgb или norm")
+    bpp(p)
+    rgb(p)
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser("delta", help="сохранить разницу стего-изображения с обложкой")
+    p.add_argument("cover")
+    p.add_argument("stego")
+    p.add_argument("output")
+    p.set_defaults(func=cmd_delta)
+
+    p = sub.add_parser("apply-delta", help="восстановить стего-изображение из обложки и разницы")
+    p.add_argument("cover")
+    p.add_argument("delta")
+    p.add_argument("output")
+    p.set_defaults(func=cmd_apply_delta)
+
+    p = sub.add_parser("quantize", help="перевести изображения в 8-битные BMP с общей палитрой")
+    p.add_argument("out_dir")
+    p.add_argument("paths", nargs="+", help="файлы или каталоги")
+    p.add_argument("--palette", required=True, metavar="IMAGE",
+                   help="палитровое изображение с общей палитрой или полноцветное для медианной квантизации")
+    p.add_argument("--cube-bits", type=int, default=5, help="разрядность куба RGB -> индекс: 5 — 32^3, 6 — 64^3")
+    p.add_argument("--dither", action="store_true", help="рассеивать ошибку квантования")
+    p.add_argument("--workers", type=int, help="число процессов (по умолчанию — по числу ядер)")
+    p.set_defaults(func=cmd_quantize)
+
+    p = sub.add_parser("scan", help="проверить изображения на встроенную нагрузку (JSON Lines)")
+    p.add_argument("paths", nargs="+", help="файлы или каталоги")
+    p.add_argument("--workers", type=int, help="число процессов (по умолчанию — по числу ядер)")
+    p.add_argument("--only-suspicious", action="store_true", help="печатать только подозрительные")
+    p.add_argument("--strategy", help="проверять только эту стратегию сортировки")
+    tables(p)
+    p.set_defaults(func=cmd_scan)
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (ValueError, OSError) as e:
+        print(f"tegan: {e}", file=sys.stderr)
+        return 1
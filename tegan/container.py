@@ -0,0 +1,184 @@
+"""
+Контейнер из нескольких именованных потоков в одной обложке.
+
+Раскладка в потоке бит изображения:
+
+    [HEADER][каталог, зарезервировано dir_capacity байт][поток][поток]...
+
+HEADER — обычный заголовок (длина и CRC32), только его нагрузка — каталог,
+так что extract_palette_lsb на контейнере вернёт сам каталог. В каталоге для
+каждого потока — имя, смещение в битах, длина в байтах и CRC32. Чтение
+одного потока трогает только заголовок, каталог и пиксели этого потока;
+добавление переписывает только пиксели нового потока и каталога.
+"""
+from PIL import Image
+import struct
+import zlib
+from typing import NamedTuple
+import numpy as np
+from .core import (_embed_stream, _check_bpp, get_palette_rgb, palette_luts, payload_length,
+                   read_index_range, symbols_to_bits, bits_to_bytes, HEADER, HEADER_BITS,
+                   CHUNK_SIZE, DEFAULT_STRATEGY)
+from .profiling import Profile, NULL_PROFILE
+from .update import patch_segments
+
+DIR_MAGIC = b"TGMX"
+DIR_VERSION = 1
+DIR_HEAD = struct.Struct(">4sBIH")  # магия, версия, зарезервировано байт, число потоков
+DIR_ENTRY = struct.Struct(">QQI")   # смещение в битах, длина в байтах, CRC32
+DIR_CAPACITY = 4096
+
+class StreamEntry(NamedTuple):
+    name: str
+    offset_bits: int
+    length: int
+    crc32: int
+
+def _pack_directory(entries, capacity):
+    out = bytearray(DIR_HEAD.pack(DIR_MAGIC, DIR_VERSION, capacity, len(entries)))
+    for e in entries:
+        name = e.name.encode("utf-8")
+        if len(name) > 255:
+            raise ValueError(f"Слишком длинное имя потока: {e.name!r}")
+        out.append(len(name))
+        out += name
+        out += DIR_ENTRY.pack(e.offset_bits, e.length, e.crc32)
+    if len(out) > capacity:
+        raise ValueError(f"Каталог не помещается в зарезервированные {capacity} байт")
+    return bytes(out)
+
+def _unpack_directory(data):
+    if len(data) < DIR_HEAD.size:
+        raise ValueError("Это не контейнер: каталог слишком короткий")
+    magic, version, capacity, count = DIR_HEAD.unpack_from(data)
+    if magic != DIR_MAGIC or version != DIR_VERSION:
+        raise ValueError("Это не контейнер: неверная сигнатура каталога")
+    entries = []
+    pos = DIR_HEAD.size
+    for _ in range(count):
+        n = data[pos]
+        name = data[pos + 1:pos + 1 + n].decode("utf-8")
+        pos += 1 + n
+        offset, length, crc = DIR_ENTRY.unpack_from(data, pos)
+        pos += DIR_ENTRY.size
+        entries.append(StreamEntry(name, offset, length, crc))
+    return capacity, entries
+
+def _read_bytes(path, offset_bits, length, strategy, bpp, tables):
+    # length байт потока бит, начиная с offset_bits; читаются только нужные пиксели
+    palette, pixels, indices = read_index_range(path, offset_bits // bpp, length * 8 // bpp)
+    parity, _ = palette_luts(palette, strategy, bpp, tables, flip=False)
+    data = bits_to_bytes(symbols_to_bits(parity[indices], bpp))
+    if len(data) < length:
+        raise ValueError("Поток выходит за пределы изображения")
+    return data, pixels
+
+def read_directory(stego_path: str, strategy: str = DEFAULT_STRATEGY, bits_per_pixel: int = 1,
+                   tables=None):
+    """(зарезервировано байт под каталог, [StreamEntry], ёмкость в битах)."""
+    _check_bpp(bits_per_pixel)
+    head, pixels = _read_bytes(stego_path, 0, HEADER.size, strategy, bits_per_pixel, tables)
+    length, crc = HEADER.unpack(head)
+    capacity_bits = pixels * bits_per_pixel
+    if HEADER_BITS + length * 8 > capacity_bits:
+        raise ValueError("Это не контейнер: длина каталога больше ёмкости")
+    data, _ = _read_bytes(stego_path, HEADER_BITS, length, strategy, bits_per_pixel, tables)
+    if zlib.crc32(data) != crc:
+        raise ValueError("Контрольная сумма каталога не совпадает")
+    capacity, entries = _unpack_directory(data)
+    return capacity, entries, capacity_bits
+
+def list_streams(stego_path: str, strategy: str = DEFAULT_STRATEGY, bits_per_pixel: int = 1,
+                 tables=None):
+    return read_directory(stego_path, strategy, bits_per_pixel, tables)[1]
+
+def extract_stream(stego_path: str, name: str, strategy: str = DEFAULT_STRATEGY,
+                   bits_per_pixel: int = 1, tables=None) -> bytes:
+    _, entries, _ = read_directory(stego_path, strategy, bits_per_pixel, tables)
+    for e in entries:
+        if e.name == name:
+            data, _ = _read_bytes(stego_path, e.offset_bits, e.length, strategy, bits_per_pixel, tables)
+            if zlib.crc32(data) != e.crc32:
+                raise ValueError(f"Контрольная сумма потока {name!r} не совпадает")
+            return data
+    raise KeyError(name)
+
+def _allocate(entries, length, data_start, capacity_bits):
+    # первый подходящий промежуток между потоками, с выравниванием на байт
+    need = length * 8
+    cursor = data_start
+    for e in sorted(entries, key=lambda e: e.offset_bits):
+        if e.offset_bits - cursor >= need:
+            return cursor
+        cursor = max(cursor, e.offset_bits + e.length * 8)
+    if capacity_bits - cursor >= need:
+        return cursor
+    raise ValueError(f"Нет свободного места под поток длиной {length} байт")
+
+def create_container(src_path: str, dst_path: str, streams, dir_capacity: int = DIR_CAPACITY,
+                     strategy: str = DEFAULT_STRATEGY, bits_per_pixel: int = 1,
+                     profile: Profile | None = None, tables=None, chunk_size: int = CHUNK_SIZE):
+    """
+    Встраивает потоки {имя: bytes | файловый объект} подряд после каталога.
+    dir_capacity — сколько байт зарезервировать под каталог на будущие add_stream.
+    """
+    _check_bpp(bits_per_pixel)
+    prof = profile or NULL_PROFILE
+    with prof.stage("open"):
+        img = Image.open(src_path).convert("P")
+        palette = get_palette_rgb(img)
+        flat = np.array(img).reshape(-1)
+    capacity_bits = flat.size * bits_per_pixel
+    with prof.stage("tables"):
+        _, flip = palette_luts(palette, strategy, bits_per_pixel, tables)
+
+    sizes = {name: payload_length(data) for name, data in streams.items()}
+    cursor = HEADER_BITS + dir_capacity * 8
+    if cursor + sum(sizes.values()) * 8 > capacity_bits:
+        raise ValueError(f"Недостаточная емкость: нужно {cursor + sum(sizes.values()) * 8} бит, "
+                         f"есть {capacity_bits}")
+    entries = []
+    with prof.stage("pixels"):
+        for name, data in streams.items():
+            _, crc = _embed_stream(flat, flip, data, sizes[name], cursor // bits_per_pixel,
+                                   chunk_size, prof, bits_per_pixel)
+            entries.append(StreamEntry(name, cursor, sizes[name], crc))
+            cursor += sizes[name] * 8
+        directory = _pack_directory(entries, dir_capacity)
+        _embed_stream(flat, flip, HEADER.pack(len(directory), zlib.crc32(directory)) + directory,
+                      HEADER.size + len(directory), 0, chunk_size, NULL_PROFILE, bits_per_pixel)
+    with prof.stage("save"):
+        img.frombytes(flat.tobytes())
+        img.save(dst_path)
+    return entries
+
+def _write_directory(stego_path, dst_path, entries, capacity, extra, strategy, bpp, profile, tables):
+    directory = _pack_directory(entries, capacity)
+    block = HEADER.pack(len(directory), zlib.crc32(directory)) + directory
+    return patch_segments(stego_path, [(0, block), *extra], dst_path, strategy, bpp, profile, tables)
+
+def add_stream(stego_path: str, name: str, data: bytes, dst_path: str | None = None,
+               strategy: str = DEFAULT_STRATEGY, bits_per_pixel: int = 1,
+               profile: Profile | None = None, tables=None) -> StreamEntry:
+    """
+    Добавляет поток в первый подходящий свободный промежуток. Остальные потоки
+    не перевстраиваются: переписываются только пиксели нового потока и каталога.
+    """
+    capacity, entries, capacity_bits = read_directory(stego_path, strategy, bits_per_pixel, tables)
+    if any(e.name == name for e in entries):
+        raise ValueError(f"Поток {name!r} уже есть")
+    offset = _allocate(entries, len(data), HEADER_BITS + capacity * 8, capacity_bits)
+    entry = StreamEntry(name, offset, len(data), zlib.crc32(data))
+    _write_directory(stego_path, dst_path, entries + [entry], capacity,
+                     [(offset // bits_per_pixel, data)], strategy, bits_per_pixel, profile, tables)
+    return entry
+
+def remove_stream(stego_path: str, name: str, dst_path: str | None = None,
+                  strategy: str = DEFAULT_STRATEGY, bits_per_pixel: int = 1,
+                  profile: Profile | None = None, tables=None):
+    """Убирает поток из каталога; его пиксели становятся свободными для add_stream."""
+    capacity, entries, _ = read_directory(stego_path, strategy, bits_per_pixel, tables)
+    rest = [e for e in entries if e.name != name]
+    if len(rest) == len(entries):
+        raise KeyError(name)
+    _write_directory(stego_path, dst_path, rest, capacity, [], strategy, bits_per_pixel, profile, tables)
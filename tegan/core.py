@@ -0,0 +1,571 @@
+from PIL import Image
+from typing import NamedTuple
+import hashlib
+import math
+import os
+import stat
+import struct
+import time
+import zlib
+import numpy as np
+from .profiling import Profile, NULL_PROFILE
+
+def get_palette_rgb(img):
+    pal = img.getpalette()[:256*3]
+    return [(pal[i], pal[i+1], pal[i+2]) for i in range(0, len(pal), 3)]
+
+def rgb_to_lab(rgb):
+    r, g, b = [x / 255.0 for x in rgb]
+    r = ((r + 0.055) / 1.055) ** 2.4 if r > 0.04045 else r / 12.92
+    g = ((g + 0.055) / 1.055) ** 2.4 if g > 0.04045 else g / 12.92
+    b = ((b + 0.055) / 1.055) ** 2.4 if b > 0.04045 else b / 12.92
+    x = r * 0.4124 + g * 0.3576 + b * 0.1805
+    y = r * 0.2126 + g * 0.7152 + b * 0.0722
+    z = r * 0.0193 + g * 0.1192 + b * 0.9505
+    x /= 0.95047
+    z /= 1.08883
+    def f(t):
+        return t ** (1/3) if t > 0.008856 else (7.787 * t) + (16 / 116)
+    fx, fy, fz = f(x), f(y), f(z)
+    L = (116 * fy) - 16
+    a = 500 * (fx - fy)
+    b = 200 * (fy - fz)
+    return (L, a, b)
+
+def color_distance(rgb1, rgb2):
+    lab1 = rgb_to_lab(rgb1)
+    lab2 = rgb_to_lab(rgb2)
+    return math.sqrt(sum((a - b) ** 2 for a, b in zip(lab1, lab2)))
+
+def weight(rgb):
+    r, g, b = rgb
+    return 0.299 * r + 0.587 * g + 0.114 * b
+
+def weight_rgb(rgb):
+    r, g, b = rgb
+    return (r << 16) + (g << 8) + b  # W = 65536*R + 256*G + B, как в test/
+
+def weight_norm(rgb):
+    r, g, b = rgb
+    return math.sqrt(r**2 + g**2 + b**2)  # как в new_idia/
+
+# Стратегии упорядочивания палитры: встраивающая и извлекающая стороны
+# должны использовать одну и ту же.
+STRATEGIES = {
+    "luma": weight,
+    "rgb": weight_rgb,
+    "norm": weight_norm,
+}
+DEFAULT_STRATEGY = "luma"
+
+CHUNK_SIZE = 1 << 20  # байт нагрузки за одну итерацию встраивания
+STRIP_ROWS = 256  # строк плоскости индексов за одну итерацию извлечения
+
+# Заголовок режима с длиной: длина нагрузки в байтах и её CRC32, big-endian
+HEADER = struct.Struct(">QI")
+HEADER_BITS = HEADER.size * 8
+
+# Сколько младших бит позиции в отсортированной палитре несёт один пиксель
+BITS_PER_PIXEL = (1, 2)
+
+def palette_digest(palette) -> str:
+    """Хэш палитры — ключ для всего, что зависит только от неё."""
+    return hashlib.sha1(bytes(c for rgb in palette for c in rgb)).hexdigest()
+
+def build_sorted_tables(palette, strategy: str = DEFAULT_STRATEGY):
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Неизвестная стратегия сортировки: {strategy!r}")
+    key = STRATEGIES[strategy]
+    indexed = list(enumerate(palette))
+    indexed.sort(key=lambda x: key(x[1]))
+    orig_to_pos = {orig: i for i, (orig, _) in enumerate(indexed)}
+    pos_to_orig = {i: orig for i, (orig, _) in enumerate(indexed)}
+    return indexed, orig_to_pos, pos_to_orig
+
+def find_nearest_color_with_lsb(target_bit, orig_idx, palette, orig_to_pos):
+    orig_color = palette[orig_idx]
+    n = len(palette)
+    candidates = []
+    for idx in range(n):
+        pos = orig_to_pos[idx]
+        if (pos & 1) == target_bit:
+            dist = color_distance(orig_color, palette[idx])
+            candidates.append((dist, idx))
+
+    if not candidates:
+        return orig_idx
+
+    candidates.sort(key=lambda x: x[0])
+    return candidates[0][1]
+
+def _check_bpp(bits_per_pixel):
+    if bits_per_pixel not in BITS_PER_PIXEL:
+        raise ValueError(f"Поддерживается {BITS_PER_PIXEL} бит на пиксель, а не {bits_per_pixel}")
+
+def build_parity_lut(orig_to_pos, bits_per_pixel: int = 1) -> np.ndarray:
+    """
+    Таблица индекс палитры -> младшие bits_per_pixel бит его позиции в
+    отсортированной палитре (при 1 — просто НЗБ).
+    """
+    _check_bpp(bits_per_pixel)
+    mask = (1 << bits_per_pixel) - 1
+    lut = np.zeros(256, dtype=np.uint8)
+    for orig, pos in orig_to_pos.items():
+        lut[orig] = pos & mask
+    return lut
+
+def lab_distance_matrix(palette) -> np.ndarray:
+    """Матрица n x n попарных расстояний CIE76 между цветами палитры."""
+    lab = np.array([rgb_to_lab(c) for c in palette], dtype=np.float64).reshape(-1, 3)
+    d = lab[:, None, :] - lab[None, :, :]
+    return np.sqrt(d[..., 0] ** 2 + d[..., 1] ** 2 + d[..., 2] ** 2)
+
+def _check_residues(parity, n, bits_per_pixel):
+    # без индекса с каким-то остатком этот символ записать нечем: встраивание молча испортит нагрузку
+    missing = sorted(set(range(1 << bits_per_pixel)) - set(parity[:n].tolist()))
+    if missing:
+        raise ValueError(f"В палитре из {n} цветов нет индексов с остатком {missing} "
+                         f"при {bits_per_pixel} бит на пиксель")
+
+def build_flip_lut(palette, orig_to_pos, bits_per_pixel: int = 1, dist: np.ndarray | None = None) -> np.ndarray:
+    """
+    Таблица 256 x 2**bits_per_pixel: lut[idx, r] — ближайший по Lab к idx индекс,
+    у которого позиция по модулю 2**bits_per_pixel равна r. При одном бите это
+    тот же индекс, что вернул бы find_nearest_color_with_lsb(r, idx, ...), но
+    посчитанный один раз на палитру. Если какого-то остатка в палитре нет — ValueError.
+    """
+    residues = 1 << bits_per_pixel
+    n = len(palette)
+    parity = build_parity_lut(orig_to_pos, bits_per_pixel)[:n]
+    _check_residues(parity, n, bits_per_pixel)
+    lut = np.tile(np.arange(256, dtype=np.uint8)[:, None], (1, residues))
+    if dist is None:
+        dist = lab_distance_matrix(palette)
+    for r in range(residues):
+        mask = parity == r
+        # argmin берёт первый минимум — как устойчивая сортировка кандидатов
+        masked = np.where(mask[None, :], dist, np.inf)
+        lut[:n, r] = np.argmin(masked, axis=1)
+    return lut
+
+def palette_luts(palette, strategy: str = DEFAULT_STRATEGY, bits_per_pixel: int = 1,
+                 tables=None, flip: bool = True):
+    """
+    (таблица чётностей, таблица замены или None) для палитры. Если передано
+    хранилище tables (TableStore), таблицы берутся из него готовыми.
+    """
+    if tables is not None:
+        entry = tables.get(palette, strategy)
+        if flip:
+            # в хранилище таблица замены есть при любой палитре, но для неполной она негодна
+            _check_residues(entry.parity(bits_per_pixel), entry.n, bits_per_pixel)
+        return entry.parity(bits_per_pixel), (entry.flip(bits_per_pixel) if flip else None)
+    _, orig_to_pos, _ = build_sorted_tables(palette, strategy)
+    parity = build_parity_lut(orig_to_pos, bits_per_pixel)
+    return parity, (build_flip_lut(palette, orig_to_pos, bits_per_pixel) if flip else None)
+
+def bits_to_symbols(bits: np.ndarray, bits_per_pixel: int) -> np.ndarray:
+    """Группирует биты по bits_per_pixel (старший первым) в значения для пикселей."""
+    if bits_per_pixel == 1:
+        return bits
+    groups = bits.reshape(-1, bits_per_pixel)
+    weights = (1 << np.arange(bits_per_pixel - 1, -1, -1)).astype(np.uint8)
+    return (groups * weights).sum(axis=1, dtype=np.uint8)
+
+def symbols_to_bits(symbols: np.ndarray, bits_per_pixel: int) -> np.ndarray:
+    if bits_per_pixel == 1:
+        return symbols
+    shifts = np.arange(bits_per_pixel - 1, -1, -1, dtype=np.uint8)
+    return ((symbols[:, None] >> shifts) & 1).astype(np.uint8).reshape(-1)
+
+def bmp_layout(f):
+    """
+    Разбирает заголовок несжатого 8-битного BMP.
+    Возвращает (w, h, top_down, off_bits, stride, palette) или None, если файл не такой.
+    """
+    head = f.read(54)
+    if len(head) < 54 or head[:2] != b"BM":
+        return None
+    off_bits, = struct.unpack_from("<I", head, 10)
+    hdr_size, width, height, _, bpp, compression = struct.unpack_from("<IiiHHI", head, 14)
+    if hdr_size < 40 or bpp != 8 or compression != 0 or width <= 0 or height == 0:
+        return None
+    clr_used, = struct.unpack_from("<I", head, 46)
+    colors = clr_used if 0 < clr_used <= 256 else 256
+    f.seek(14 + hdr_size)
+    raw = f.read(colors * 4)
+    palette = [(raw[i+2], raw[i+1], raw[i]) for i in range(0, len(raw) - 3, 4)]
+    stride = (width + 3) & ~3  # строки выровнены на 4 байта
+    return width, abs(height), height < 0, off_bits, stride, palette
+
+def is_palette_bmp(path) -> bool:
+    # Image.open читает только заголовок; mode "P" отсекает серые BMP, которые PIL открывает как "L"
+    with Image.open(path) as probe:
+        return probe.format == "BMP" and probe.mode == "P"
+
+def _bmp_strips(path, layout, strip_rows):
+    w, h, top_down, off_bits, stride, _ = layout
+    with open(path, "rb") as f:
+        for y0 in range(0, h, strip_rows):
+            rows = min(strip_rows, h - y0)
+            first = y0 if top_down else h - y0 - rows
+            f.seek(off_bits + first * stride)
+            block = np.frombuffer(f.read(rows * stride), dtype=np.uint8).reshape(rows, stride)[:, :w]
+            if not top_down:
+                block = block[::-1]
+            yield block.reshape(-1)
+
+def open_index_strips(path, strip_rows: int = STRIP_ROWS):
+    """
+    Возвращает (palette, (w, h), генератор полос индексов сверху вниз).
+    Несжатый 8-битный BMP читается полосами прямо из файла, без декодирования
+    всего изображения; остальные форматы декодируются через PIL и режутся на полосы.
+    """
+    if is_palette_bmp(path):
+        with open(path, "rb") as f:
+            layout = bmp_layout(f)
+        if layout is not None:
+            w, h = layout[0], layout[1]
+            return layout[5], (w, h), _bmp_strips(path, layout, strip_rows)
+    img = Image.open(path).convert("P")
+    w, h = img.size
+    plane = np.asarray(img)
+    strips = (plane[y0:y0 + strip_rows].reshape(-1) for y0 in range(0, h, strip_rows))
+    return get_palette_rgb(img), (w, h), strips
+
+def read_index_range(path, start: int, count: int):
+    """
+    (palette, число пикселей, индексы пикселей [start, start + count)). Из
+    несжатого 8-битного BMP читаются только покрывающие строки.
+    """
+    if is_palette_bmp(path):
+        with open(path, "rb") as f:
+            layout = bmp_layout(f)
+            if layout is not None:
+                w, h, top_down, off_bits, stride, palette = layout
+                count = max(0, min(count, w * h - start))
+                if count == 0:
+                    return palette, w * h, np.empty(0, dtype=np.uint8)
+                y0 = start // w
+                y1 = (start + count - 1) // w + 1
+                f.seek(off_bits + (y0 if top_down else h - y1) * stride)
+                block = np.frombuffer(f.read((y1 - y0) * stride), dtype=np.uint8).reshape(-1, stride)[:, :w]
+                if not top_down:
+                    block = block[::-1]
+                lo = start - y0 * w
+                return palette, w * h, block.reshape(-1)[lo:lo + count]
+    img = Image.open(path).convert("P")
+    flat = np.asarray(img).reshape(-1)
+    return get_palette_rgb(img), flat.size, flat[start:start + count]
+
+def bytes_to_bits(payload: bytes) -> np.ndarray:
+    """Биты полезной нагрузки MSB→LSB."""
+    return np.unpackbits(np.frombuffer(payload, dtype=np.uint8))
+
+def bits_to_bytes(bits: np.ndarray) -> bytes:
+    """Обратное к bytes_to_bits; неполный последний байт отбрасывается."""
+    full = len(bits) // 8 * 8
+    return np.packbits(bits[:full]).tobytes()
+
+def payload_length(payload, payload_len: int | None = None) -> int:
+    """Заявленная длина нагрузки в байтах: bytes, файловый объект или итератор байтов."""
+    if payload_len is not None:
+        return payload_len
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return memoryview(payload).nbytes
+    if hasattr(payload, "read"):
+        try:
+            st = os.fstat(payload.fileno())
+            if stat.S_ISREG(st.st_mode):  # у каналов и сокетов st_size ничего не значит
+                return st.st_size - payload.tell()
+        except (AttributeError, OSError, ValueError):
+            pass
+        if hasattr(payload, "getbuffer"):  # io.BytesIO
+            return payload.getbuffer().nbytes - payload.tell()
+    raise ValueError("Не удалось определить длину нагрузки: передайте payload_len")
+
+def iter_payload_chunks(payload, chunk_size: int = CHUNK_SIZE):
+    """Отдаёт нагрузку кусками, не собирая её целиком в памяти."""
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        mv = memoryview(payload).cast("B")
+        for i in range(0, len(mv), chunk_size):
+            yield mv[i:i + chunk_size]
+    elif hasattr(payload, "read"):
+        for chunk in iter(lambda: payload.read(chunk_size), b""):
+            yield chunk
+    else:
+        for chunk in payload:
+            yield chunk
+
+def _embed_stream(flat, flip, payload, total, start, chunk_size, prof, bpp=1, digest=None):
+    # встраивает поток кусков в flat начиная с пикселя start; возвращает (изменено, crc32)
+    k = start
+    end = start + total * 8 // bpp
+    changed = 0
+    crc = 0
+    for chunk in iter_payload_chunks(payload, chunk_size):
+        sym = bits_to_symbols(np.unpackbits(np.frombuffer(chunk, dtype=np.uint8)), bpp)
+        if k + len(sym) > end:
+            raise ValueError(f"Нагрузка длиннее заявленной длины {total} байт")
+        crc = zlib.crc32(chunk, crc)
+        if digest is not None:
+            digest.update(chunk)
+        seg = flat[k:k + len(sym)]
+        new = flip[seg, sym]
+        changed += int(np.count_nonzero(new != seg))
+        seg[:] = new
+        k += len(sym)
+        if prof.wants_progress:
+            prof.progress((k - start) * bpp, total * 8)
+    if k != end:
+        raise ValueError(f"Нагрузка короче заявленной: {(k - start) * bpp // 8} из {total} байт")
+    prof.count("pixels_visited", k - start)
+    prof.count("pixels_changed", changed)
+    return changed, crc
+
+class EmbedResult(NamedTuple):
+    payload_bytes: int
+    crc32: int
+    sha256: str
+    pixels_visited: int
+    pixels_changed: int
+    verified: bool | None  # None — проверка не запрашивалась
+    seconds: float
+
+def _verify_flat(flat, parity, total, crc, header, bpp, chunk_size):
+    # читает чётности только затронутого диапазона и сверяет CRC (и заголовок)
+    start = HEADER_BITS // bpp if header else 0
+    if header and HEADER.unpack(bits_to_bytes(symbols_to_bits(parity[flat[:start]], bpp))) != (total, crc):
+        return False
+    end = start + total * 8 // bpp
+    step = chunk_size * 8 // bpp
+    got = 0
+    for k in range(start, end, step):
+        got = zlib.crc32(bits_to_bytes(symbols_to_bits(parity[flat[k:min(k + step, end)]], bpp)), got)
+    return got == crc
+
+def _embed_flat(flat, palette, payload, total, strategy, prof, chunk_size, header, bpp, tables,
+                verify=False):
+    # встраивает в готовую плоскость индексов flat на месте; (изменено, crc32, sha256, проверено)
+    start = HEADER_BITS // bpp if header else 0
+    capacity = flat.size * bpp
+    if start * bpp + total * 8 > capacity:
+        raise ValueError(f"Недостаточная емкость: нужно {start * bpp + total * 8} бит, есть {capacity}")
+    with prof.stage("tables"):
+        parity, flip = palette_luts(palette, strategy, bpp, tables)
+
+    digest = hashlib.sha256()
+    with prof.stage("pixels"):
+        changed, crc = _embed_stream(flat, flip, payload, total, start, chunk_size, prof, bpp, digest)
+        if header:
+            # CRC известен только после прохода по потоку, поэтому заголовок пишется последним;
+            # его пиксели считаются здесь, чтобы прогресс не прыгал назад
+            head_changed = _embed_stream(flat, flip, HEADER.pack(total, crc), HEADER.size, 0,
+                                         chunk_size, NULL_PROFILE, bpp)[0]
+            changed += head_changed
+            prof.count("pixels_visited", start)
+            prof.count("pixels_changed", head_changed)
+    verified = None
+    if verify:
+        with prof.stage("verify"):
+            verified = _verify_flat(flat, parity, total, crc, header, bpp, chunk_size)
+        if not verified:
+            raise ValueError("Проверка встраивания не прошла: извлечённая нагрузка не совпадает")
+    return changed, crc, digest.hexdigest(), verified
+
+def _embed_result(total, embedded, header, bpp, t0) -> EmbedResult:
+    changed, crc, sha, verified = embedded
+    visited = ((HEADER_BITS if header else 0) + total * 8) // bpp
+    return EmbedResult(total, crc, sha, visited, changed, verified, time.perf_counter() - t0)
+
+def _embed(src_path, dst_path, payload, strategy, profile, payload_len, chunk_size, header, bpp, tables,
+           verify=False) -> EmbedResult:
+    t0 = time.perf_counter()
+    _check_bpp(bpp)
+    prof = profile or NULL_PROFILE
+    total = payload_length(payload, payload_len)
+    with prof.stage("open"):
+        img = Image.open(src_path).convert("P")
+        palette = get_palette_rgb(img)
+        flat = np.array(img).reshape(-1)
+    embedded = _embed_flat(flat, palette, payload, total, strategy, prof, chunk_size, header, bpp,
+                           tables, verify)
+    with prof.stage("save"):
+        img.frombytes(flat.tobytes())
+        img.save(dst_path)
+    return _embed_result(total, embedded, header, bpp, t0)
+
+def embed_palette_lsb_nohdr(src_path: str, dst_path: str, payload, strategy: str = DEFAULT_STRATEGY,
+                            profile: Profile | None = None, payload_len: int | None = None,
+                            chunk_size: int = CHUNK_SIZE, bits_per_pixel: int = 1, tables=None,
+                            verify: bool = False) -> EmbedResult:
+    """
+    payload — bytes, файловый объект или итератор байтовых кусков. Нагрузка
+    читается кусками по chunk_size байт, так что память не зависит от её размера;
+    ёмкость проверяется по заявленной длине (payload_len) до первого пикселя.
+    При bits_per_pixel=2 пиксель несёт два бита в pos & 3 — вдвое меньше
+    затронутых пикселей ценой большего сдвига цвета. tables — TableStore с
+    готовыми таблицами палитр.
+
+    verify=True сверяет чётности затронутых пикселей с CRC нагрузки ещё в
+    памяти, до записи файла, — перечитывать результат не нужно. Возвращает
+    EmbedResult: длину, CRC32 и SHA-256 нагрузки, число пройденных и
+    изменённых пикселей, итог проверки и время.
+    """
+    return _embed(src_path, dst_path, payload, strategy, profile, payload_len, chunk_size,
+                  header=False, bpp=bits_per_pixel, tables=tables, verify=verify)
+
+def embed_palette_lsb(src_path: str, dst_path: str, payload, strategy: str = DEFAULT_STRATEGY,
+                      profile: Profile | None = None, payload_len: int | None = None,
+                      chunk_size: int = CHUNK_SIZE, bits_per_pixel: int = 1, tables=None,
+                      verify: bool = False) -> EmbedResult:
+    """
+    Как embed_palette_lsb_nohdr, но перед нагрузкой пишет заголовок HEADER:
+    длину в байтах и CRC32 нагрузки. Извлекать через extract_palette_lsb
+    с тем же bits_per_pixel.
+    """
+    return _embed(src_path, dst_path, payload, strategy, profile, payload_len, chunk_size,
+                  header=True, bpp=bits_per_pixel, tables=tables, verify=verify)
+
+def extract_palette_lsb_nohdr(stego_path: str, bit_len: int, strategy: str = DEFAULT_STRATEGY,
+                              profile: Profile | None = None, bits_per_pixel: int = 1,
+                              strip_rows: int = STRIP_ROWS, tables=None) -> bytes:
+    prof = profile or NULL_PROFILE
+    with prof.stage("open"):
+        palette, _, strips = open_index_strips(stego_path, strip_rows)
+    with prof.stage("tables"):
+        parity, _ = palette_luts(palette, strategy, bits_per_pixel, tables, flip=False)
+
+    need = -(-bit_len // bits_per_pixel)  # пикселей
+    out = []
+    got = 0
+    with prof.stage("pixels"):
+        for strip in strips:
+            strip = strip[:need - got]
+            out.append(symbols_to_bits(parity[strip], bits_per_pixel))
+            got += len(strip)
+            if prof.wants_progress:
+                prof.progress(got * bits_per_pixel, bit_len)
+            if got >= need:
+                break
+    prof.count("pixels_visited", got)
+    with prof.stage("bits"):
+        bits = np.concatenate(out) if out else np.empty(0, dtype=np.uint8)
+        return bits_to_bytes(bits[:bit_len])
+
+def _iter_parity_bytes(parities, bpp=1):
+    # полосы значений пикселей -> байты MSB→LSB с переносом неполного байта между полосами
+    rest = np.empty(0, dtype=np.uint8)
+    for sym in parities:
+        bits = symbols_to_bits(sym, bpp)
+        if rest.size:
+            bits = np.concatenate((rest, bits))
+        full = len(bits) // 8 * 8
+        rest = bits[full:]
+        if full:
+            yield np.packbits(bits[:full]).tobytes()
+
+def _read_header(stream):
+    head = b""
+    for chunk in stream:
+        head += chunk
+        if len(head) >= HEADER.size:
+            break
+    if len(head) < HEADER.size:
+        raise ValueError("Недостаточно битов для заголовка длины")
+    total, crc = HEADER.unpack_from(head)
+    return total, crc, head[HEADER.size:]
+
+def peek_header(stego_path: str, strategy: str = DEFAULT_STRATEGY, bits_per_pixel: int = 1,
+                tables=None):
+    """(длина, crc32) из заголовка или None, если заголовка там быть не может."""
+    palette, (w, h), strips = open_index_strips(stego_path, strip_rows=8)
+    parity, _ = palette_luts(palette, strategy, bits_per_pixel, tables, flip=False)
+    try:
+        total, crc, _ = _read_header(_iter_parity_bytes((parity[s] for s in strips), bits_per_pixel))
+    except ValueError:
+        return None
+    if HEADER_BITS + total * 8 > w * h * bits_per_pixel:
+        return None
+    return total, crc
+
+def iter_extract_palette_lsb(stego_path: str, strategy: str = DEFAULT_STRATEGY,
+                             strip_rows: int = STRIP_ROWS, profile: Profile | None = None,
+                             bits_per_pixel: int = 1, tables=None):
+    """
+    Генератор кусков нагрузки, встроенной embed_palette_lsb. Плоскость индексов
+    читается полосами по strip_rows строк, так что память не зависит ни от
+    размера нагрузки, ни (для BMP) от размера изображения. CRC32 из заголовка
+    проверяется после последнего куска; при несовпадении — ValueError.
+    """
+    prof = profile or NULL_PROFILE
+    with prof.stage("open"):
+        palette, (w, h), strips = open_index_strips(stego_path, strip_rows)
+    with prof.stage("tables"):
+        parity, _ = palette_luts(palette, strategy, bits_per_pixel, tables, flip=False)
+
+    yield from _iter_payload(strips, parity, w * h * bits_per_pixel, bits_per_pixel, prof)
+
+def _iter_payload(strips, parity, capacity_bits, bpp, prof):
+    # общая часть извлечения с заголовком: полосы значений -> куски нагрузки с проверкой CRC
+    stream = _iter_parity_bytes((parity[s] for s in strips), bpp)
+    total, crc_expected, pending = _read_header(stream)
+    if HEADER_BITS + total * 8 > capacity_bits:
+        raise ValueError(f"Повреждённый заголовок: длина {total} байт больше ёмкости")
+
+    crc = 0
+    left = total
+    while left > 0:
+        if not pending:
+            with prof.stage("pixels"):
+                pending = next(stream, b"")
+            if not pending:
+                break
+        piece = pending[:left]
+        pending = b""
+        crc = zlib.crc32(piece, crc)
+        left -= len(piece)
+        if prof.wants_progress:
+            prof.progress((total - left) * 8, total * 8)
+        yield piece
+    prof.count("pixels_visited", (HEADER_BITS + (total - left) * 8) // bpp)
+    if left:
+        raise ValueError(f"Нагрузка обрывается: не хватает {left} байт")
+    if crc != crc_expected:
+        raise ValueError("Контрольная сумма нагрузки не совпадает")
+
+def extract_palette_lsb_to(stego_path: str, sink, strategy: str = DEFAULT_STRATEGY,
+                           strip_rows: int = STRIP_ROWS, profile: Profile | None = None,
+                           bits_per_pixel: int = 1, tables=None) -> int:
+    """Пишет нагрузку в файловый объект sink по мере декодирования; возвращает число байт."""
+    n = 0
+    for piece in iter_extract_palette_lsb(stego_path, strategy, strip_rows, profile, bits_per_pixel, tables):
+        sink.write(piece)
+        n += len(piece)
+    return n
+
+def extract_palette_lsb(stego_path: str, strategy: str = DEFAULT_STRATEGY,
+                        profile: Profile | None = None, bits_per_pixel: int = 1, tables=None) -> bytes:
+    return b"".join(iter_extract_palette_lsb(stego_path, strategy, profile=profile,
+                                             bits_per_pixel=bits_per_pixel, tables=tables))
+
+def measure_distortion(cover_path: str, stego_path: str) -> dict:
+    """Средний и максимальный ΔE (CIE76) по изменённым пикселям и PSNR по RGB."""
+    cover = Image.open(cover_path).convert("P")
+    stego = Image.open(stego_path).convert("P")
+    a = np.asarray(cover).reshape(-1)
+    b = np.asarray(stego).reshape(-1)
+    pal_a = np.array(get_palette_rgb(cover), dtype=np.float64)
+    pal_b = np.array(get_palette_rgb(stego), dtype=np.float64)
+    changed = np.flatnonzero(a != b)
+    rgb_a, rgb_b = pal_a[a[changed]], pal_b[b[changed]]
+    lab_a = np.array([rgb_to_lab(c) for c in pal_a], dtype=np.float64)[a[changed]]
+    lab_b = np.array([rgb_to_lab(c) for c in pal_b], dtype=np.float64)[b[changed]]
+    delta_e = np.sqrt(((lab_a - lab_b) ** 2).sum(axis=1))
+    mse = ((rgb_a - rgb_b) ** 2).sum() / (a.size * 3)
+    return {
+        "pixels_changed": int(changed.size),
+        "mean_delta_e": float(delta_e.mean()) if changed.size else 0.0,
+        "max_delta_e": float(delta_e.max()) if changed.size else 0.0,
+        "psnr": float("inf") if mse == 0 else float(10 * math.log10(255 ** 2 / mse)),
+    }
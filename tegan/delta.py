@@ -0,0 +1,117 @@
+"""
+Компактная разница между обложкой и стего-изображением.
+
+Стего отличается от обложки только в части пикселей первых len(bits), так
+что вместо второго изображения хранится список изменений:
+
+    [DELTA_HEAD][пропуски, varint][длины серий, varint][новые индексы подряд]
+
+Изменённые пиксели склеены в серии подряд идущих; для каждой серии —
+сколько неизменённых пикселей перед ней и её длина (LEB128), затем все новые
+индексы одним блоком. Секции колоночные, так что кодирование и применение —
+несколько векторных операций NumPy без цикла по сериям. В заголовке — размеры
+и SHA-256 обложки (палитра и плоскость индексов), чтобы разницу нельзя было
+применить не к той обложке.
+"""
+from PIL import Image
+import hashlib
+import struct
+import numpy as np
+from .core import get_palette_rgb
+
+DELTA_MAGIC = b"TGDL"
+DELTA_VERSION = 1
+# магия, версия, ширина, высота, SHA-256 обложки, серий, байт пропусков, байт длин
+DELTA_HEAD = struct.Struct(">4sBII32sQQQ")
+
+def cover_digest(palette, indices) -> bytes:
+    """SHA-256 палитры и плоскости индексов — не зависит от формата файла."""
+    h = hashlib.sha256(bytes(c for rgb in palette for c in rgb))
+    h.update(np.ascontiguousarray(indices, dtype=np.uint8).tobytes())
+    return h.digest()
+
+def _varint_encode(values: np.ndarray) -> np.ndarray:
+    v = values.astype(np.uint64)
+    nbytes = np.ones(len(v), dtype=np.int64)
+    rest = v >> np.uint64(7)
+    while rest.any():
+        nbytes += rest > 0
+        rest >>= np.uint64(7)
+    owner = np.repeat(np.arange(len(v)), nbytes)
+    k = np.arange(owner.size) - np.repeat(np.cumsum(nbytes) - nbytes, nbytes)
+    out = (v[owner] >> (np.uint64(7) * k.astype(np.uint64))) & np.uint64(0x7F)
+    out |= np.where(k < nbytes[owner] - 1, np.uint64(0x80), np.uint64(0))
+    return out.astype(np.uint8)
+
+def _varint_decode(buf: np.ndarray, count: int) -> np.ndarray:
+    ends = np.flatnonzero((buf & 0x80) == 0)
+    if len(ends) != count or (count and ends[-1] != len(buf) - 1):
+        raise ValueError("Повреждённая разница: неверная varint-секция")
+    if count == 0:
+        return np.empty(0, dtype=np.int64)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    k = np.arange(len(buf)) - np.repeat(starts, ends - starts + 1)
+    parts = (buf & 0x7F).astype(np.uint64) << (np.uint64(7) * k.astype(np.uint64))
+    return np.bitwise_or.reduceat(parts, starts).astype(np.int64)
+
+def _load(path):
+    img = Image.open(path).convert("P")
+    return img, get_palette_rgb(img), np.array(img).reshape(-1)
+
+def make_delta(cover_path: str, stego_path: str) -> bytes:
+    """Разница стего относительно обложки; палитры должны совпадать."""
+    cover, palette, a = _load(cover_path)
+    stego, stego_palette, b = _load(stego_path)
+    if cover.size != stego.size:
+        raise ValueError(f"Размеры не совпадают: {cover.size} и {stego.size}")
+    if palette != stego_palette:
+        raise ValueError("Палитры обложки и стего-изображения не совпадают")
+    changed = np.flatnonzero(a != b)
+    # серии подряд идущих изменённых пикселей
+    breaks = np.flatnonzero(np.diff(changed) != 1) + 1
+    starts = changed[np.concatenate(([0], breaks))] if changed.size else changed
+    lengths = np.diff(np.concatenate(([0], breaks, [changed.size]))) if changed.size else changed
+    gaps = starts - np.concatenate(([0], (starts + lengths)[:-1]))
+    gap_bytes = _varint_encode(gaps)
+    len_bytes = _varint_encode(lengths)
+    w, h = cover.size
+    head = DELTA_HEAD.pack(DELTA_MAGIC, DELTA_VERSION, w, h, cover_digest(palette, a), len(starts),
+                           gap_bytes.size, len_bytes.size)
+    return head + gap_bytes.tobytes() + len_bytes.tobytes() + b[changed].tobytes()
+
+def _parse(delta):
+    if len(delta) < DELTA_HEAD.size:
+        raise ValueError("Это не разница: слишком короткая")
+    magic, version, w, h, digest, runs, gap_size, len_size = DELTA_HEAD.unpack_from(delta)
+    if magic != DELTA_MAGIC or version != DELTA_VERSION:
+        raise ValueError("Это не разница: неверная сигнатура")
+    buf = np.frombuffer(delta, dtype=np.uint8, offset=DELTA_HEAD.size)
+    gaps = _varint_decode(buf[:gap_size], runs)
+    lengths = _varint_decode(buf[gap_size:gap_size + len_size], runs)
+    values = buf[gap_size + len_size:]
+    if lengths.sum() != values.size:
+        raise ValueError("Повреждённая разница: число индексов не совпадает с длинами серий")
+    return w, h, digest, gaps, lengths, values
+
+def delta_info(delta: bytes) -> dict:
+    w, h, digest, gaps, lengths, values = _parse(delta)
+    return {"width": w, "height": h, "cover_sha256": digest.hex(), "runs": len(lengths),
+            "pixels_changed": int(values.size), "bytes": len(delta)}
+
+def apply_delta(cover_path: str, delta: bytes, dst_path: str) -> int:
+    """
+    Восстанавливает стего-изображение из обложки и разницы и пишет его в
+    dst_path. Возвращает число изменённых пикселей.
+    """
+    w, h, digest, gaps, lengths, values = _parse(delta)
+    img, palette, flat = _load(cover_path)
+    if img.size != (w, h) or cover_digest(palette, flat) != digest:
+        raise ValueError("Разница снята с другой обложки")
+    run_starts = np.cumsum(gaps + np.concatenate(([0], lengths[:-1])))
+    offsets = np.repeat(run_starts - np.cumsum(lengths) + lengths, lengths) + np.arange(values.size)
+    if values.size and offsets[-1] >= flat.size:
+        raise ValueError("Повреждённая разница: смещение за пределами изображения")
+    flat[offsets] = values
+    img.frombytes(flat.tobytes())
+    img.save(dst_path)
+    return int(values.size)
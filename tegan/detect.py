@@ -0,0 +1,110 @@
+"""
+Стегоанализ под нашу же схему по чётностям позиций в отсортированной палитре.
+
+Соседние пиксели обложки обычно одного цвета, поэтому чётности их позиций
+совпадают в 70–95% пар. На встроенном участке чётность — бит нагрузки, и
+совпадений ровно половина: хи-квадрат по парам соседних чётностей (совпали /
+не совпали против 50/50) даёт там большое p-значение. Нагрузка пишется с
+первого пикселя подряд, так что по сегментам растровой развёртки видно, где
+она кончается. Сильно зашумлённые обложки (например, с дизерингом) могут
+давать ложные срабатывания.
+
+Классический тест пар значений (2k, 2k+1) здесь не работает: пиксель уходит
+не к соседу по паре, а к ближайшему по Lab цвету нужной чётности.
+"""
+from PIL import Image
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .core import get_palette_rgb, palette_luts, STRATEGIES
+
+IMAGE_EXTS = (".bmp", ".png", ".gif", ".tif", ".tiff")
+TOLERANCE = 0.02  # допустимое отклонение доли совпадений от 1/2 на встроенном сегменте
+
+def chi2_half(equal: np.ndarray, total: np.ndarray):
+    """Хи-квадрат (1 степень свободы) и p-значение гипотезы «совпадений ровно половина»."""
+    half = np.maximum(total, 1) / 2
+    chi2 = 2 * (equal - half) ** 2 / half
+    # при одной степени свободы Q(1/2, chi2/2) = erfc(sqrt(chi2/2))
+    p = np.vectorize(math.erfc, otypes=[float])(np.sqrt(chi2 / 2))
+    return chi2, p
+
+def analyze_indices(indices: np.ndarray, palette, strategies=None, segments: int = 64,
+                    tolerance: float = TOLERANCE, tables=None):
+    """
+    Оценивает плоскость индексов при каждой стратегии сортировки.
+    Для каждой: оценка длины нагрузки в битах — начало развёртки из сегментов,
+    где доля совпадающих соседних чётностей в пределах 1/2 ± tolerance, — и
+    хи-квадрат с p-значением на этом префиксе (или на первом сегменте, если он пуст).
+    """
+    flat = indices.reshape(-1)
+    total = flat.size
+    if total < 2:
+        raise ValueError("Слишком маленькое изображение")
+    # пара (j, j+1) попадает в сегмент j*segments // (total-1); bounds — концы сегментов в пикселях
+    seg = np.arange(total - 1, dtype=np.int64) * segments // (total - 1)
+    bounds = -(-np.arange(1, segments + 1, dtype=np.int64) * (total - 1) // segments) + 1
+    pairs = np.bincount(seg, minlength=segments)
+    result = {}
+    for strategy in strategies or STRATEGIES:
+        parity, _ = palette_luts(palette, strategy, tables=tables, flip=False)
+        par = parity[flat]
+        equal = np.bincount(seg, weights=par[1:] == par[:-1], minlength=segments)
+        rate = equal / np.maximum(pairs, 1)
+        off = np.flatnonzero(np.abs(rate - 0.5) > tolerance)
+        run = segments if off.size == 0 else int(off[0])
+        est = int(bounds[run - 1]) if run else 0
+        chi2, p = chi2_half(equal[:max(run, 1)].sum(), pairs[:max(run, 1)].sum())
+        result[strategy] = {
+            "chi2": float(chi2),
+            "p": float(p),
+            "equal_rate": float(rate[:max(run, 1)].mean()),
+            "estimated_bits": est,
+        }
+    return result
+
+def scan_image(path: str, strategies=None, segments: int = 64, tolerance: float = TOLERANCE,
+               tables=None):
+    with Image.open(path) as img:
+        if img.mode != "P":
+            return {"path": path, "skipped": f"режим {img.mode}, а не палитровый"}
+        palette = get_palette_rgb(img)
+        indices = np.asarray(img)
+    stats = analyze_indices(indices, palette, strategies, segments, tolerance, tables)
+    best = max(stats, key=lambda s: (stats[s]["estimated_bits"], -abs(stats[s]["equal_rate"] - 0.5)))
+    return {
+        "path": path,
+        "pixels": int(indices.size),
+        "strategy": best,
+        "suspicious": stats[best]["estimated_bits"] > 0,
+        "estimated_bits": stats[best]["estimated_bits"],
+        "strategies": stats,
+    }
+
+def _scan_one(args):
+    path, strategies, segments, tolerance, tables = args
+    try:
+        return scan_image(path, strategies, segments, tolerance, tables)
+    except (OSError, ValueError) as e:
+        return {"path": path, "error": str(e)}
+
+def iter_image_paths(roots, exts=IMAGE_EXTS):
+    for root in roots:
+        if os.path.isfile(root):
+            yield root
+            continue
+        for dirpath, _, names in os.walk(root):
+            for name in sorted(names):
+                if name.lower().endswith(exts):
+                    yield os.path.join(dirpath, name)
+
+def scan_paths(paths, workers: int | None = None, strategies=None, segments: int = 64,
+               tolerance: float = TOLERANCE, chunksize: int = 16, tables=None):
+    """Сканирует изображения пулом процессов; результаты отдаются в порядке путей."""
+    jobs = ((p, strategies, segments, tolerance, tables) for p in paths)
+    if workers == 1:
+        yield from map(_scan_one, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_scan_one, jobs, chunksize=chunksize)
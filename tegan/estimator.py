@@ -0,0 +1,96 @@
+"""
+Оценка ёмкости и искажения обложки без встраивания.
+
+Один векторный проход строит накопленные по строкам гистограммы индексов:
+встраивание трогает только первые пиксели развёртки, и гистограмма этого
+префикса берётся разностью двух строк без повторного прохода. Дальше всё
+считается по 256 записям: для каждого индекса таблица замены даёт, во что он
+превратится при каждом значении символа, а значит — вероятность смены,
+средний ΔE и средний квадрат сдвига RGB при случайной нагрузке. Гистограммы
+можно посчитать один раз (index_histogram) и прогнать через estimate сколько
+угодно длин нагрузки и стратегий.
+"""
+import math
+from typing import NamedTuple
+import numpy as np
+from .core import (open_index_strips, palette_luts, lab_distance_matrix, _check_bpp, HEADER_BITS,
+                   DEFAULT_STRATEGY)
+
+class CoverHistogram(NamedTuple):
+    palette: list
+    width: int
+    rows: np.ndarray  # (h + 1) x 256: счётчики индексов в первых y строках
+
+    @property
+    def pixels(self) -> int:
+        return self.width * (len(self.rows) - 1)
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self.rows[-1]
+
+    def prefix_counts(self, pixels: int) -> np.ndarray:
+        """Счётчики индексов первых pixels пикселей; неполная строка — пропорционально."""
+        y, rest = divmod(min(pixels, self.pixels), max(self.width, 1))
+        counts = self.rows[y].astype(np.float64)
+        if rest:
+            counts += (self.rows[y + 1] - self.rows[y]) * (rest / self.width)
+        return counts
+
+def index_histogram(cover_path: str) -> CoverHistogram:
+    """Накопленные по строкам гистограммы индексов за один проход по полосам."""
+    palette, (w, h), strips = open_index_strips(cover_path)
+    rows = np.zeros((h + 1, 256), dtype=np.int64)
+    y = 0
+    for strip in strips:
+        n = len(strip) // w
+        # номер строки * 256 + индекс: гистограммы всех строк полосы одним bincount
+        key = (np.arange(len(strip)) // w) * 256 + strip
+        rows[y + 1:y + 1 + n] = np.bincount(key, minlength=n * 256).reshape(n, 256)
+        y += n
+    np.cumsum(rows, axis=0, out=rows)
+    return CoverHistogram(palette, w, rows)
+
+def _entry_costs(palette, strategy, bpp, tables):
+    # для каждого индекса — средние по символам: доля смен, ΔE и квадрат сдвига RGB
+    _, flip = palette_luts(palette, strategy, bpp, tables)
+    n = len(palette)
+    dist = tables.get(palette, strategy).dist[:n, :n] if tables is not None else lab_distance_matrix(palette)
+    rgb = np.array(palette, dtype=np.float64).reshape(-1, 3)
+    idx = np.arange(n)
+    target = flip[:n].astype(np.intp)
+    p_change = (target != idx[:, None]).mean(axis=1)
+    delta_e = dist[idx[:, None], target].mean(axis=1)
+    sq = ((rgb[:, None, :] - rgb[target]) ** 2).sum(axis=2).mean(axis=1)
+    return p_change, delta_e, sq
+
+def estimate(cover, payload_len: int, strategy: str = DEFAULT_STRATEGY, bits_per_pixel: int = 1,
+             tables=None, header: bool = True) -> dict:
+    """
+    Ожидаемые pixels_changed, mean_delta_e (по изменённым пикселям) и psnr для
+    случайной нагрузки длиной payload_len байт — те же величины, что у
+    measure_distortion. cover — путь или CoverHistogram. Цвета берутся из
+    гистограммы ровно тех первых пикселей развёртки, которые тронет встраивание.
+    """
+    _check_bpp(bits_per_pixel)
+    hist = cover if isinstance(cover, CoverHistogram) else index_histogram(cover)
+    n = len(hist.palette)
+    capacity = hist.pixels * bits_per_pixel
+    need = (HEADER_BITS if header else 0) + payload_len * 8
+    result = {"capacity_bits": capacity, "payload_bits": need, "fits": need <= capacity}
+    used = -(-min(need, capacity) // bits_per_pixel)
+    if n == 0 or hist.pixels == 0:
+        return {**result, "pixels_visited": used, "pixels_changed": 0.0, "mean_delta_e": 0.0,
+                "psnr": float("inf")}
+
+    p_change, delta_e, sq = _entry_costs(hist.palette, strategy, bits_per_pixel, tables)
+    share = hist.prefix_counts(used)[:n]  # затронутые пиксели каждого индекса
+    changed = float(share @ p_change)
+    mse = float(share @ sq) / (hist.pixels * 3)
+    return {
+        **result,
+        "pixels_visited": used,
+        "pixels_changed": changed,
+        "mean_delta_e": float(share @ delta_e) / changed if changed else 0.0,
+        "psnr": float("inf") if mse == 0 else 10 * math.log10(255 ** 2 / mse),
+    }
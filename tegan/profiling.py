@@ -0,0 +1,79 @@
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+class Profile:
+    """
+    Таймеры стадий, счётчики и необязательный колбэк прогресса.
+
+    Функции встраивания/извлечения принимают profile=None; без него используется
+    NULL_PROFILE, у которого все методы пустые, а прогресс не вызывается вовсе —
+    горячие циклы проверяют profile.wants_progress один раз на строку.
+    """
+
+    def __init__(self, progress=None):
+        self.timings = {}
+        self.counters = {}
+        self._progress = progress
+        self.wants_progress = progress is not None
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - t0
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def progress(self, done: int, total: int):
+        if self._progress is not None:
+            self._progress(done, total)
+
+    def to_dict(self):
+        return {"timings": dict(self.timings), "counters": dict(self.counters)}
+
+    def to_json(self, path: str | None = None) -> str:
+        text = json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+    def to_prometheus(self, path: str | None = None, prefix: str = "tegan") -> str:
+        """Формат textfile-коллектора node_exporter."""
+        lines = [
+            f"# TYPE {prefix}_stage_seconds gauge",
+            *(f'{prefix}_stage_seconds{{stage="{k}"}} {v:.9f}' for k, v in self.timings.items()),
+        ]
+        for k, v in self.counters.items():
+            lines.append(f"# TYPE {prefix}_{k}_total counter")
+            lines.append(f"{prefix}_{k}_total {v}")
+        text = "\n".join(lines) + "\n"
+        if path is not None:
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text)
+            # коллектор не должен увидеть недописанный файл
+            os.replace(tmp, path)
+        return text
+
+class _NullProfile(Profile):
+    _null = nullcontext()
+
+    def __init__(self):
+        super().__init__()
+
+    def stage(self, name: str):
+        return self._null
+
+    def count(self, name: str, n: int = 1):
+        pass
+
+    def progress(self, done: int, total: int):
+        pass
+
+NULL_PROFILE = _NullProfile()
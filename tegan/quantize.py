@@ -0,0 +1,141 @@
+"""
+Пакетный перевод полноцветных изображений в 8-битные BMP с одной общей палитрой.
+
+image.quantize(colors=256, method=2) строит палитру под каждое изображение:
+это медленно, и у каждой обложки своя палитра, так что таблицы палитр
+(TableStore, ExtractCache) не переиспользуются. Здесь палитра одна на всю
+пачку: по ней один раз строится куб (2**bits)^3 «RGB -> ближайший по Lab
+индекс», и каждое изображение переводится одной выборкой из куба. Выходные
+файлы получают одинаковую палитру и один palette_digest.
+"""
+from PIL import Image
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .core import get_palette_rgb
+from .detect import iter_image_paths, IMAGE_EXTS
+
+CUBE_BITS = 5  # 32 x 32 x 32
+SOURCE_EXTS = IMAGE_EXTS + (".jpg", ".jpeg", ".webp")
+_LUT_CHUNK = 1 << 12  # ячеек куба за один проход поиска ближайшего: 4096 x 256 float64 — 8 МБ
+
+def _lab(rgb: np.ndarray) -> np.ndarray:
+    # векторный rgb_to_lab: те же формулы над массивом ... x 3 в 0..255
+    c = rgb / 255.0
+    c = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    x = (c @ np.array([0.4124, 0.3576, 0.1805])) / 0.95047
+    y = c @ np.array([0.2126, 0.7152, 0.0722])
+    z = (c @ np.array([0.0193, 0.1192, 0.9505])) / 1.08883
+    x, y, z = (np.where(t > 0.008856, np.cbrt(t), 7.787 * t + 16 / 116) for t in (x, y, z))
+    return np.stack((116 * y - 16, 500 * (x - y), 200 * (y - z)), axis=-1)
+
+def load_palette(path: str):
+    """Палитра из палитрового изображения или медианной квантизацией полноцветного."""
+    with Image.open(path) as img:
+        if img.mode != "P":
+            img = img.convert("RGB").quantize(colors=256, method=2)
+        return get_palette_rgb(img)
+
+def build_color_cube(palette, bits: int = CUBE_BITS) -> np.ndarray:
+    """Куб (2**bits)^3: центр ячейки RGB -> ближайший по Lab индекс палитры."""
+    if not 1 <= bits <= 8:
+        raise ValueError(f"Разрядность куба должна быть от 1 до 8, а не {bits}")
+    side = 1 << bits
+    step = 256 // side
+    centers = np.arange(side) * step + (step - 1) / 2
+    grid = np.stack(np.meshgrid(centers, centers, centers, indexing="ij"), axis=-1).reshape(-1, 3)
+    pal_lab = _lab(np.array(palette, dtype=np.float64).reshape(-1, 3))
+    pal_sq = (pal_lab ** 2).sum(axis=1)
+    cube = np.empty(len(grid), dtype=np.uint8)
+    for i in range(0, len(grid), _LUT_CHUNK):
+        # |a - b|^2 = |a|^2 - 2 a.b + |b|^2; |a|^2 от индекса палитры не зависит
+        d = pal_sq[None, :] - 2 * (_lab(grid[i:i + _LUT_CHUNK]) @ pal_lab.T)
+        cube[i:i + _LUT_CHUNK] = np.argmin(d, axis=1)
+    return cube.reshape(side, side, side)
+
+def quantize_array(rgb: np.ndarray, cube: np.ndarray, palette=None, dither: bool = False) -> np.ndarray:
+    """
+    Массив h x w x 3 uint8 -> плоскость индексов h x w. Без dither — одна
+    выборка из куба. С dither ошибка рассеивается вниз (1/4, 1/2, 1/4 на
+    соседей следующей строки): строки идут по очереди, а внутри строки всё
+    векторно, без попиксельного цикла Флойда — Стейнберга. Для dither нужна palette.
+    """
+    bits = int(np.log2(cube.shape[0]))
+    shift = 8 - bits
+    if not dither:
+        # один линейный номер ячейки и take быстрее выборки по трём массивам индексов
+        q = (rgb >> shift).astype(np.intp)
+        return cube.reshape(-1).take((q[..., 0] << (2 * bits)) | (q[..., 1] << bits) | q[..., 2])
+    if palette is None:
+        raise ValueError("Для рассеивания ошибки нужна palette")
+    pal = np.array(palette, dtype=np.float64).reshape(-1, 3)
+    h, w, _ = rgb.shape
+    out = np.empty((h, w), dtype=np.uint8)
+    carry = np.zeros((w, 3))
+    for y in range(h):
+        row = np.clip(rgb[y] + carry, 0, 255)
+        q = row.astype(np.uint8) >> shift
+        idx = cube[q[:, 0], q[:, 1], q[:, 2]]
+        out[y] = idx
+        err = row - pal[idx]
+        carry = err / 2
+        carry[1:] += err[:-1] / 4
+        carry[:-1] += err[1:] / 4
+    return out
+
+def quantize_image(src_path: str, dst_path: str, cube: np.ndarray, palette, dither: bool = False):
+    with Image.open(src_path) as img:
+        rgb = np.asarray(img.convert("RGB"))
+    out = Image.fromarray(quantize_array(rgb, cube, palette, dither), "P")
+    out.putpalette([c for color in palette for c in color])
+    out.save(dst_path, format="BMP")
+
+_worker = {}
+
+def _init_worker(cube, palette, dither):
+    # куб строится один раз в родителе и передаётся воркерам при старте
+    _worker.update(cube=cube, palette=palette, dither=dither)
+
+def _quantize_one(job):
+    src, dst = job
+    if dst is None:
+        return {"path": src, "error": "Выходное имя совпадает с другим файлом пачки"}
+    try:
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        quantize_image(src, dst, _worker["cube"], _worker["palette"], _worker["dither"])
+        return {"path": src, "output": dst}
+    except (OSError, ValueError) as e:
+        return {"path": src, "error": str(e)}
+
+def _jobs(paths, out_dir):
+    # (исходный файл, выходной BMP): подкаталоги сохраняются относительно корня;
+    # если два файла всё равно дают одно имя (a.jpg и a.png), второй получает None
+    seen = set()
+    jobs = []
+    for root in paths:
+        for src in iter_image_paths([root], SOURCE_EXTS):
+            rel = os.path.basename(src) if os.path.isfile(root) else os.path.relpath(src, root)
+            dst = os.path.join(out_dir, os.path.splitext(rel)[0] + ".bmp")
+            key = os.path.normcase(os.path.abspath(dst))
+            jobs.append((src, None if key in seen else dst))
+            seen.add(key)
+    return jobs
+
+def quantize_paths(paths, out_dir: str, palette, bits: int = CUBE_BITS, dither: bool = False,
+                   workers: int | None = None, chunksize: int = 16):
+    """
+    Переводит изображения (файлы или каталоги) в BMP с общей палитрой в out_dir
+    пулом процессов, повторяя структуру подкаталогов. Результаты — словари
+    {path, output} или {path, error} в порядке путей; файл, чьё выходное имя
+    уже занято другим файлом пачки, не пишется и получает error.
+    """
+    cube = build_color_cube(palette, bits)
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = _jobs(paths, out_dir)
+    if workers == 1:
+        _init_worker(cube, palette, dither)
+        yield from map(_quantize_one, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(cube, palette, dither)) as pool:
+        yield from pool.map(_quantize_one, jobs, chunksize=chunksize)
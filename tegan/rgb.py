@@ -0,0 +1,99 @@
+"""
+НЗБ-встраивание в каналы полноцветного изображения, без перевода в палитру.
+
+Каждый байт канала (R, G, B подряд в растровом порядке) несёт lsb_bits младших
+бит. Это тот же конвейер, что и у палитрового режима: «палитра» — тождественная,
+а таблица замены 256 x 2**lsb_bits — просто (v & ~mask) | s, так что
+встраивание и извлечение идут теми же векторными проходами по кускам и полосам.
+Заголовок (длина и CRC32) и API такие же, как у embed_palette_lsb.
+"""
+from PIL import Image
+import numpy as np
+from .core import (_embed_stream, _iter_payload, payload_length, HEADER, HEADER_BITS, CHUNK_SIZE,
+                   STRIP_ROWS)
+from .profiling import Profile, NULL_PROFILE
+
+RGB_LSB_BITS = (1, 2, 4)  # делители 8: символ не переходит границу байта нагрузки
+LOSSLESS_FORMATS = ("BMP", "PNG", "TIFF")
+
+def _check_lsb(lsb_bits):
+    if lsb_bits not in RGB_LSB_BITS:
+        raise ValueError(f"Поддерживается {RGB_LSB_BITS} младших бит на канал, а не {lsb_bits}")
+
+def build_rgb_luts(lsb_bits: int = 1):
+    """(значение байта -> младшие бит, таблица замены 256 x 2**lsb_bits)."""
+    _check_lsb(lsb_bits)
+    mask = (1 << lsb_bits) - 1
+    values = np.arange(256, dtype=np.uint8)
+    parity = values & mask
+    replace = (values[:, None] & ~np.uint8(mask)) | np.arange(1 << lsb_bits, dtype=np.uint8)[None, :]
+    return parity, replace.astype(np.uint8)
+
+def rgb_capacity(path: str, lsb_bits: int = 1) -> int:
+    """Ёмкость в битах вместе с заголовком."""
+    _check_lsb(lsb_bits)
+    with Image.open(path) as img:
+        return img.width * img.height * 3 * lsb_bits
+
+def _output_format(dst_path):
+    ext = "." + dst_path.rsplit(".", 1)[-1].lower() if "." in dst_path else ""
+    fmt = Image.registered_extensions().get(ext)
+    if fmt not in LOSSLESS_FORMATS:
+        raise ValueError(f"Нужен формат без потерь {LOSSLESS_FORMATS}, а не {fmt or ext!r}")
+    return fmt
+
+def embed_rgb_lsb(src_path: str, dst_path: str, payload, lsb_bits: int = 1,
+                  profile: Profile | None = None, payload_len: int | None = None,
+                  chunk_size: int = CHUNK_SIZE):
+    """
+    Встраивает нагрузку (bytes, файловый объект или итератор кусков) с заголовком
+    в lsb_bits младших бит каждого канала. Ёмкость — w*h*3*lsb_bits бит против
+    w*h у палитрового режима.
+    """
+    _check_lsb(lsb_bits)
+    fmt = _output_format(dst_path)
+    prof = profile or NULL_PROFILE
+    total = payload_length(payload, payload_len)
+    with prof.stage("open"):
+        img = Image.open(src_path).convert("RGB")
+        w, h = img.size
+    capacity = w * h * 3 * lsb_bits
+    if HEADER_BITS + total * 8 > capacity:
+        raise ValueError(f"Недостаточная емкость: нужно {HEADER_BITS + total * 8} бит, есть {capacity}")
+    with prof.stage("tables"):
+        _, replace = build_rgb_luts(lsb_bits)
+    with prof.stage("open"):
+        flat = np.array(img).reshape(-1)
+    with prof.stage("pixels"):
+        _, crc = _embed_stream(flat, replace, payload, total, HEADER_BITS // lsb_bits, chunk_size,
+                               prof, lsb_bits)
+        head_changed = _embed_stream(flat, replace, HEADER.pack(total, crc), HEADER.size, 0, chunk_size,
+                                     NULL_PROFILE, lsb_bits)[0]
+    prof.count("pixels_visited", HEADER_BITS // lsb_bits)
+    prof.count("pixels_changed", head_changed)
+    with prof.stage("save"):
+        Image.fromarray(flat.reshape(h, w, 3)).save(dst_path, format=fmt)
+
+def iter_extract_rgb_lsb(stego_path: str, lsb_bits: int = 1, strip_rows: int = STRIP_ROWS,
+                         profile: Profile | None = None):
+    """Генератор кусков нагрузки по полосам растра; CRC проверяется в конце."""
+    _check_lsb(lsb_bits)
+    prof = profile or NULL_PROFILE
+    with prof.stage("open"):
+        img = Image.open(stego_path).convert("RGB")
+        w, h = img.size
+        plane = np.asarray(img)
+    parity, _ = build_rgb_luts(lsb_bits)
+    strips = (plane[y0:y0 + strip_rows].reshape(-1) for y0 in range(0, h, strip_rows))
+    yield from _iter_payload(strips, parity, w * h * 3 * lsb_bits, lsb_bits, prof)
+
+def extract_rgb_lsb_to(stego_path: str, sink, lsb_bits: int = 1, strip_rows: int = STRIP_ROWS,
+                       profile: Profile | None = None) -> int:
+    n = 0
+    for piece in iter_extract_rgb_lsb(stego_path, lsb_bits, strip_rows, profile):
+        sink.write(piece)
+        n += len(piece)
+    return n
+
+def extract_rgb_lsb(stego_path: str, lsb_bits: int = 1, profile: Profile | None = None) -> bytes:
+    return b"".join(iter_extract_rgb_lsb(stego_path, lsb_bits, profile=profile))
@@ -0,0 +1,134 @@
+import os
+from collections import OrderedDict
+import numpy as np
+from .cache import evict_lru
+from .core import (build_sorted_tables, build_parity_lut, build_flip_lut, lab_distance_matrix,
+                   palette_digest, BITS_PER_PIXEL, DEFAULT_STRATEGY)
+
+# Одна запись — одна палитра при одной стратегии. Всё, что нужно встраиванию,
+# извлечению и оценкам, лежит в одном .npy и открывается через mmap без разбора.
+ENTRY_DTYPE = np.dtype([
+    ("n", "<u2"),
+    ("orig_to_pos", "u1", 256),
+    ("pos_to_orig", "u1", 256),
+    *((f"parity{b}", "u1", 256) for b in BITS_PER_PIXEL),
+    *((f"flip{b}", "u1", (256, 1 << b)) for b in BITS_PER_PIXEL),
+    ("dist", "<f4", (256, 256)),  # ΔE CIE76; за пределами n — NaN
+])
+
+class PaletteTables:
+    """Представление одной записи хранилища; массивы — только для чтения."""
+
+    def __init__(self, record):
+        self._record = record
+
+    @property
+    def n(self) -> int:
+        return int(self._record["n"])
+
+    @property
+    def orig_to_pos(self) -> np.ndarray:
+        return self._record["orig_to_pos"]
+
+    @property
+    def pos_to_orig(self) -> np.ndarray:
+        return self._record["pos_to_orig"]
+
+    @property
+    def dist(self) -> np.ndarray:
+        return self._record["dist"]
+
+    def parity(self, bits_per_pixel: int = 1) -> np.ndarray:
+        return self._record[f"parity{bits_per_pixel}"]
+
+    def flip(self, bits_per_pixel: int = 1) -> np.ndarray:
+        return self._record[f"flip{bits_per_pixel}"]
+
+def build_entry(palette, strategy: str = DEFAULT_STRATEGY) -> np.ndarray:
+    n = len(palette)
+    _, orig_to_pos, pos_to_orig = build_sorted_tables(palette, strategy)
+    dist = lab_distance_matrix(palette)
+    rec = np.zeros((), dtype=ENTRY_DTYPE)
+    rec["n"] = n
+    for orig, pos in orig_to_pos.items():
+        rec["orig_to_pos"][orig] = pos
+        rec["pos_to_orig"][pos] = orig
+    for b in BITS_PER_PIXEL:
+        rec[f"parity{b}"] = build_parity_lut(orig_to_pos, b)
+        try:
+            rec[f"flip{b}"] = build_flip_lut(palette, orig_to_pos, b, dist)
+        except ValueError:
+            pass  # палитра мала для b бит: запись годится для извлечения, palette_luts откажет во встраивании
+    rec["dist"] = np.nan
+    rec["dist"][:n, :n] = dist
+    return rec
+
+class TableStore:
+    """
+    Дисковое хранилище таблиц палитр, общее для процессов.
+
+    Ключ — (palette_digest, стратегия). Записи пишутся атомарно (tmp + rename) и
+    открываются через mmap только для чтения, так что свежий воркер получает
+    готовые таблицы без вычислений, а страницы делятся между процессами.
+    Когда каталог больше max_bytes, вытесняются давно не использованные записи.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 256 * 1024 * 1024, max_open: int = 64):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_open = max_open
+        self._open = OrderedDict()
+        os.makedirs(root, exist_ok=True)
+
+    def __getstate__(self):
+        # открытые mmap не передаются в дочерние процессы — там откроются заново
+        return {"root": self.root, "max_bytes": self.max_bytes, "max_open": self.max_open}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _path(self, digest, strategy):
+        return os.path.join(self.root, f"{digest}-{strategy}.npy")
+
+    def get(self, palette, strategy: str = DEFAULT_STRATEGY) -> PaletteTables:
+        path = self._path(palette_digest(palette), strategy)
+        cached = self._open.get(path)
+        if cached is not None:
+            self._open.move_to_end(path)
+            return cached
+        try:
+            record = np.load(path, mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            record = self._put(path, build_entry(palette, strategy))
+        else:
+            try:
+                os.utime(path)  # отмечаем использование для LRU
+            except OSError:
+                pass  # хранилище только для чтения: LRU без отметки
+        entry = PaletteTables(record)
+        self._open[path] = entry
+        if len(self._open) > self.max_open:
+            self._open.popitem(last=False)
+        return entry
+
+    def _put(self, path, rec):
+        # в хранилище, куда нельзя писать, запись остаётся только в памяти процесса
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.save(f, rec)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return rec
+        evict_lru(self.root, self.max_bytes, ".npy")
+        return rec
+
+    def clear(self):
+        self._open.clear()
+        for e in os.scandir(self.root):
+            if e.name.endswith(".npy"):
+                os.remove(e.path)
@@ -0,0 +1,138 @@
+from PIL import Image
+import os
+import shutil
+import numpy as np
+from .core import (get_palette_rgb, palette_luts, bytes_to_bits, bits_to_symbols, bmp_layout,
+                   is_palette_bmp, DEFAULT_STRATEGY)
+from .profiling import Profile, NULL_PROFILE
+
+def _diff(indices, symbols, luts, prof):
+    # номера пикселей, чьё значение расходится с новым, и их новые индексы
+    parity, flip = luts()
+    changed = np.flatnonzero(parity[indices] != symbols)
+    prof.count("pixels_visited", len(indices))
+    prof.count("pixels_changed", changed.size)
+    if changed.size == 0:
+        return changed, changed
+    return changed, flip()[indices[changed], symbols[changed]]
+
+def _lazy_luts(palette, strategy, bpp, tables, prof):
+    # таблица замены нужна, только если что-то действительно меняется
+    cache = {}
+
+    def flip():
+        if "flip" not in cache:
+            with prof.stage("tables"):
+                cache["flip"] = palette_luts(palette, strategy, bpp, tables)[1]
+        return cache["flip"]
+
+    def luts():
+        with prof.stage("tables"):
+            parity, _ = palette_luts(palette, strategy, bpp, tables, flip=False)
+        return parity, flip
+    return luts
+
+def _check_segments(segments, capacity):
+    for start, symbols in segments:
+        if start < 0 or start + len(symbols) > capacity:
+            raise ValueError(f"Недостаточная емкость: нужно {start + len(symbols)} пикс., есть {capacity}")
+
+def _patch_bmp(path, segments, strategy, bpp, prof, tables):
+    with open(path, "r+b") as f:
+        layout = bmp_layout(f)
+        if layout is None:
+            return None
+        w, h, top_down, off_bits, stride, palette = layout
+        _check_segments(segments, w * h)
+        luts = _lazy_luts(palette, strategy, bpp, tables, prof)
+        total = 0
+        for start, symbols in segments:
+            if len(symbols) == 0:
+                continue
+            # читаем только строки, покрывающие пиксели [start, start + len)
+            y0 = start // w
+            y1 = (start + len(symbols) - 1) // w + 1
+            first_row = y0 if top_down else h - y1
+            f.seek(off_bits + first_row * stride)
+            block = np.frombuffer(f.read((y1 - y0) * stride), dtype=np.uint8).reshape(-1, stride)[:, :w]
+            if not top_down:
+                block = block[::-1]
+            lo = start - y0 * w
+            indices = block.reshape(-1)[lo:lo + len(symbols)]
+
+            changed, new_idx = _diff(indices, symbols, luts, prof)
+            y, x = np.divmod(changed + start, w)
+            file_rows = y if top_down else h - 1 - y
+            offsets = off_bits + file_rows * stride + x
+            with prof.stage("pixels"):
+                for off, v in zip(offsets.tolist(), new_idx.tolist()):
+                    f.seek(off)
+                    f.write(bytes((v,)))
+            total += int(changed.size)
+        return total
+
+def _rewrite_image(src_path, dst_path, segments, strategy, bpp, prof, tables):
+    with prof.stage("open"):
+        img = Image.open(src_path).convert("P")
+        palette = get_palette_rgb(img)
+    w, h = img.size
+    _check_segments(segments, w * h)
+    luts = _lazy_luts(palette, strategy, bpp, tables, prof)
+    flat = np.asarray(img).reshape(-1)
+    pixels = img.load()
+    total = 0
+    for start, symbols in segments:
+        changed, new_idx = _diff(flat[start:start + len(symbols)], symbols, luts, prof)
+        with prof.stage("pixels"):
+            for k, v in zip((changed + start).tolist(), new_idx.tolist()):
+                pixels[k % w, k // w] = v
+        total += int(changed.size)
+    with prof.stage("save"):
+        img.save(dst_path)
+    return total
+
+def patch_segments(stego_path: str, segments, dst_path: str | None = None,
+                   strategy: str = DEFAULT_STRATEGY, bits_per_pixel: int = 1,
+                   profile: Profile | None = None, tables=None) -> int:
+    """
+    Переписывает пиксели так, чтобы с пикселя start читались заданные значения,
+    для каждого (start, payload_bytes) из segments. Трогает только пиксели,
+    где значение расходится. Возвращает число переписанных пикселей.
+    """
+    prof = profile or NULL_PROFILE
+    segments = [(start, bits_to_symbols(bytes_to_bits(data), bits_per_pixel)) for start, data in segments]
+    if dst_path is None:
+        dst_path = stego_path
+    copy = dst_path != stego_path
+    # патч на месте — только если и результат BMP; иначе копия унесла бы байты BMP под чужим именем
+    if is_palette_bmp(stego_path) and (not copy or os.path.splitext(dst_path)[1].lower() == ".bmp"):
+        with open(stego_path, "rb") as f:
+            layout = bmp_layout(f)
+        if layout is not None:
+            # ёмкость проверяется до копии, чтобы ошибка не оставила копию в dst_path
+            _check_segments(segments, layout[0] * layout[1])
+            if copy:
+                shutil.copyfile(stego_path, dst_path)
+            try:
+                return _patch_bmp(dst_path, segments, strategy, bits_per_pixel, prof, tables)
+            except BaseException:
+                if copy:
+                    os.remove(dst_path)
+                raise
+    return _rewrite_image(stego_path, dst_path, segments, strategy, bits_per_pixel, prof, tables)
+
+def update_palette_lsb_nohdr(stego_path: str, payload: bytes, dst_path: str | None = None,
+                             strategy: str = DEFAULT_STRATEGY, profile: Profile | None = None,
+                             tables=None, bits_per_pixel: int = 1, offset_bits: int = 0) -> int:
+    """
+    Обновляет нагрузку в уже встроенном стего-изображении: сравнивает новые биты
+    с чётностями, которые там уже есть, и переписывает только расходящиеся пиксели.
+    Для несжатого 8-битного BMP пиксели патчатся прямо в файле; остальные форматы
+    перекодируются целиком. Результат совпадает с embed_palette_lsb_nohdr по
+    извлекаемым битам. offset_bits — с какого бита потока писать (кратно
+    bits_per_pixel). Возвращает число переписанных пикселей.
+    """
+    if offset_bits % bits_per_pixel:
+        raise ValueError(f"Смещение {offset_bits} не кратно {bits_per_pixel} бит на пиксель")
+    return patch_segments(stego_path, [(offset_bits // bits_per_pixel, payload)], dst_path,
+                          strategy, bits_per_pixel, profile, tables)
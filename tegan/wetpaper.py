@@ -0,0 +1,196 @@
+"""
+Встраивание с ограничением искажения: пиксели, смена чётности которых стоит
+дороже max_cost (ΔE CIE76 до ближайшего цвета с другой чётностью), «мокрые» —
+их нельзя трогать. Получатель маску не знает, поэтому используется код мокрой
+бумаги (wet paper / syndrome coding):
+
+- пиксели перемешиваются перестановкой от key и режутся на блоки по BLOCK
+  штук; первые HEADER_BLOCKS блоков несут заголовок, остальные — нагрузку;
+- блок несёт k бит как синдром D @ x (mod 2), где x — чётности пикселей
+  блока, а D — общая для всех блоков случайная матрица k x BLOCK от key;
+- отправитель решает D @ v = m ^ D @ x только по сухим столбцам (метод Гаусса
+  над GF(2), строки упакованы в uint64 и исключаются сразу во всех блоках),
+  и переставляет чётность там, где v = 1.
+
+Извлечению маска не нужна: синдромы считаются по одним чётностям. Заголовок
+(длина, CRC32, k) кодируется так же, только с постоянными HEADER_RATE бит на
+блок, так что ни один пиксель, включая пиксели заголовка, не меняется дороже
+max_cost. Только один бит на пиксель.
+"""
+from PIL import Image
+import struct
+import zlib
+import numpy as np
+from .core import (get_palette_rgb, palette_luts, lab_distance_matrix,
+                   open_index_strips, iter_payload_chunks, bytes_to_bits, bits_to_bytes,
+                   CHUNK_SIZE, DEFAULT_STRATEGY)
+from .profiling import Profile, NULL_PROFILE
+
+BLOCK = 64     # пикселей в блоке — ровно одно слово uint64
+MAX_RATE = 48  # больше бит на блок: слишком часто не хватает сухих пикселей
+WET_HEADER = struct.Struct(">QIB")  # длина в байтах, CRC32, бит на блок
+WET_HEADER_BITS = WET_HEADER.size * 8
+HEADER_RATE = 16  # бит заголовка на блок: с запасом сходится и при трети сухих пикселей
+HEADER_BLOCKS = -(-WET_HEADER_BITS // HEADER_RATE)
+
+def flip_cost_lut(palette, strategy: str = DEFAULT_STRATEGY, tables=None) -> np.ndarray:
+    """Таблица индекс -> ΔE до индекса, которым его заменит смена чётности."""
+    parity, flip = palette_luts(palette, strategy, 1, tables)
+    if tables is not None:
+        dist = tables.get(palette, strategy).dist
+    else:
+        dist = lab_distance_matrix(palette)
+    n = len(palette)
+    cost = np.full(256, np.inf, dtype=np.float64)
+    idx = np.arange(n)
+    cost[:n] = dist[idx, flip[idx, 1 - parity[idx]]]
+    return cost
+
+def _layout(npixels, key):
+    # (блоки заголовка, блоки нагрузки, матрица D): всё выводится из key и размера
+    blocks = npixels // BLOCK - HEADER_BLOCKS
+    if blocks <= 0:
+        raise ValueError("Изображение слишком маленькое для кода мокрой бумаги")
+    rng = np.random.default_rng(key)
+    order = rng.permutation(npixels)[:(HEADER_BLOCKS + blocks) * BLOCK].reshape(-1, BLOCK)
+    rows = rng.integers(0, np.iinfo(np.uint64).max, size=MAX_RATE, dtype=np.uint64, endpoint=True)
+    return order[:HEADER_BLOCKS], order[HEADER_BLOCKS:], rows
+
+def _pack_words(bits):
+    # (блоки, 64) нулей и единиц -> (блоки,) uint64, бит j — пиксель j блока
+    return np.packbits(bits.astype(np.uint8), axis=1, bitorder="little").view("<u8").reshape(-1)
+
+def _syndromes(words, rows):
+    # (блоки,) x (k,) -> (блоки, k) бит D @ x; чётность числа единиц — свёрткой слова
+    x = words[:, None] & rows[None, :]
+    for shift in (32, 16, 8, 4, 2, 1):
+        x ^= x >> np.uint64(shift)
+    return (x & np.uint64(1)).astype(np.uint8)
+
+def _solve(dry, rhs, rows):
+    """
+    Для каждого блока — слово v с единицами только на сухих местах, такое что
+    D @ v = rhs. Возвращает (v, маска блоков, где решения нет).
+    """
+    a = rows[None, :] & dry[:, None]
+    rhs = rhs.copy()
+    v = np.zeros(len(dry), dtype=np.uint64)
+    failed = np.zeros(len(dry), dtype=bool)
+    one = np.uint64(1)
+    for i in range(len(rows)):
+        row = a[:, i]
+        dead = row == 0
+        # строка обнулилась: решение есть, только если и правая часть нулевая
+        failed |= dead & (rhs[:, i] != 0)
+        pivot = row & (~row + one)  # младший ненулевой бит строки
+        hit = (a & pivot[:, None]) != 0
+        hit[:, i] = False
+        a ^= np.where(hit, row[:, None], np.uint64(0))
+        rhs ^= hit & rhs[:, i:i + 1].astype(bool)
+    # после исключения каждая строка i держит свой ведущий столбец одна
+    for i in range(len(rows)):
+        row = a[:, i]
+        pivot = row & (~row + one)
+        v |= np.where(rhs[:, i] != 0, pivot, np.uint64(0))
+    return v, failed
+
+def _encode(flat, order, rows, bits, parity, cost, max_cost, what):
+    # пиксели блоков order, чью чётность надо сменить, чтобы синдромы стали bits
+    rate = len(rows)
+    message = np.zeros(len(order) * rate, dtype=np.uint8)
+    message[:len(bits)] = bits
+    idx = flat[order]
+    wet = cost[idx] > max_cost
+    rhs = _syndromes(_pack_words(parity[idx]), rows) ^ message.reshape(len(order), rate)
+    v, failed = _solve(_pack_words(~wet), rhs, rows)
+    if failed.any():
+        raise ValueError(f"Не хватает сухих пикселей для {what} в {int(failed.sum())} блоках из "
+                         f"{len(order)}: поднимите max_cost или уменьшите нагрузку")
+    change = np.unpackbits(v.view(np.uint8).reshape(len(order), 8), axis=1, bitorder="little").astype(bool)
+    return order[change], int(np.count_nonzero(wet))
+
+def wet_capacity(cover_path: str, max_cost: float, strategy: str = DEFAULT_STRATEGY,
+                 tables=None) -> dict:
+    """Сколько пикселей сухие и сколько байт нагрузки поместится при таком max_cost."""
+    img = Image.open(cover_path).convert("P")
+    palette = get_palette_rgb(img)
+    flat = np.asarray(img).reshape(-1)
+    dry = int(np.count_nonzero(flip_cost_lut(palette, strategy, tables)[flat] <= max_cost))
+    blocks = max(flat.size // BLOCK - HEADER_BLOCKS, 0)
+    # запас в 16 сухих пикселей на блок сверх k, чтобы исключение почти всегда сходилось
+    rate = min(MAX_RATE, max(0, dry * BLOCK // max(flat.size, 1) - 16))
+    return {"pixels": int(flat.size), "dry_pixels": dry, "blocks": blocks, "max_bytes": blocks * rate // 8}
+
+def embed_wet_paper(src_path: str, dst_path: str, payload, max_cost: float,
+                    strategy: str = DEFAULT_STRATEGY, key: int = 0,
+                    profile: Profile | None = None, tables=None, chunk_size: int = CHUNK_SIZE,
+                    payload_len: int | None = None) -> int:
+    """
+    Встраивает нагрузку (bytes, файловый объект или итератор кусков), не трогая
+    пиксели дороже max_cost — ни в нагрузке, ни в заголовке. Бит на блок
+    берётся минимальный, какой вмещает нагрузку, — так меняется меньше
+    пикселей. Если в каких-то блоках не хватает сухих пикселей — ValueError:
+    поднимите max_cost или уменьшите нагрузку. payload_len, если задан, сверяется
+    с длиной прочитанной нагрузки, как у embed_palette_lsb. Возвращает число
+    изменённых пикселей.
+    """
+    prof = profile or NULL_PROFILE
+    data = b"".join(bytes(c) for c in iter_payload_chunks(payload, chunk_size))
+    if payload_len is not None and len(data) > payload_len:
+        raise ValueError(f"Нагрузка длиннее заявленной длины {payload_len} байт")
+    if payload_len is not None and len(data) < payload_len:
+        raise ValueError(f"Нагрузка короче заявленной: {len(data)} из {payload_len} байт")
+    with prof.stage("open"):
+        img = Image.open(src_path).convert("P")
+        palette = get_palette_rgb(img)
+        flat = np.array(img).reshape(-1)
+    with prof.stage("tables"):
+        parity, flip = palette_luts(palette, strategy, 1, tables)
+        cost = flip_cost_lut(palette, strategy, tables)
+        head_order, order, rows = _layout(flat.size, key)
+
+    bits = bytes_to_bits(data)
+    rate = max(1, -(-len(bits) // len(order)))
+    if rate > MAX_RATE:
+        raise ValueError(f"Недостаточная емкость: нужно {len(bits)} бит, "
+                         f"есть {len(order) * MAX_RATE} при {MAX_RATE} бит на блок")
+    used = -(-len(bits) // rate)
+
+    with prof.stage("pixels"):
+        targets, wet = _encode(flat, order[:used], rows[:rate], bits, parity, cost, max_cost, "нагрузки")
+        head = bytes_to_bits(WET_HEADER.pack(len(data), zlib.crc32(data), rate))
+        head_targets, head_wet = _encode(flat, head_order, rows[:HEADER_RATE], head, parity, cost,
+                                         max_cost, "заголовка")
+        # блоки заголовка и нагрузки не пересекаются, так что менять можно разом
+        targets = np.concatenate((targets, head_targets))
+        flat[targets] = flip[flat[targets], 1 - parity[flat[targets]]]
+    prof.count("pixels_wet", wet + head_wet)
+    prof.count("pixels_visited", (HEADER_BLOCKS + used) * BLOCK)
+    prof.count("pixels_changed", int(targets.size))
+    with prof.stage("save"):
+        img.frombytes(flat.tobytes())
+        img.save(dst_path)
+    return int(targets.size)
+
+def extract_wet_paper(stego_path: str, strategy: str = DEFAULT_STRATEGY, key: int = 0,
+                      profile: Profile | None = None, tables=None) -> bytes:
+    prof = profile or NULL_PROFILE
+    with prof.stage("open"):
+        palette, (w, h), strips = open_index_strips(stego_path)
+        flat = np.concatenate(list(strips))
+    with prof.stage("tables"):
+        parity, _ = palette_luts(palette, strategy, 1, tables, flip=False)
+        head_order, order, rows = _layout(flat.size, key)
+    head = _syndromes(_pack_words(parity[flat[head_order]]), rows[:HEADER_RATE]).reshape(-1)
+    total, crc, rate = WET_HEADER.unpack(bits_to_bytes(head[:WET_HEADER_BITS]))
+    if not 1 <= rate <= MAX_RATE or total * 8 > len(order) * rate:
+        raise ValueError(f"Повреждённый заголовок: длина {total} байт при {rate} бит на блок")
+    used = -(-total * 8 // rate)
+    with prof.stage("pixels"):
+        x = _pack_words(parity[flat[order[:used]]])
+        bits = _syndromes(x, rows[:rate]).reshape(-1)
+    prof.count("pixels_visited", (HEADER_BLOCKS + used) * BLOCK)
+    data = bits_to_bytes(bits[:total * 8])
+    if zlib.crc32(data) != crc:
+        raise ValueError("Контрольная сумма нагрузки не совпадает")
+    return data
@@ -1,7 +1,7 @@
-from utils import *
-
-secret = b"Hello my fdfksdfjsdlkfsdjfslk;dfjslkddfjslkdfjlksdjfdfjslkdfjlksdjfdfjslkdfjlksdjfdfjslkdfjlksdjfdfjslkdfjlksdjfdfjslkdfjlksdjfdfjslkdfjlksdjfdfjslkdfjlksdjffjlksdjf;lksdjfklsjdflksjdflksjdfjsdkjgj5rtjgohdfogdfjgodfigj"
-embed_palette_lsb_nohdr("cat.bmp", "stego.bmp", secret)
-restored = extract_palette_lsb_nohdr("stego.bmp", len(secret)*8)
-print(restored, restored == secret)
+from tegan.core import embed_palette_lsb_nohdr
 
+if __name__ == "__main__":
+    secret = b"Hello my fdfksdfjsdlkfsdjfslk;dfjslkddfjslkdfjlksdjfdfjslkdfjlksdjfdfjslkdfjlksdjfdfjslkdfjlksdjfdfjslkdfjlksdjfdfjslkdfjlksdjfdfjslkdfjlksdjfdfjslkdfjlksdjffjlksdjf;lksdjfklsjdflksjdflksjdfjsdkjgj5rtjgohdfogdfjgodfigj"
+    # стратегия rgb: порядок W = 65536*R + 256*G + B; проверка идёт в памяти до записи stego.bmp
+    result = embed_palette_lsb_nohdr("cat.bmp", "stego.bmp", secret, strategy="rgb", verify=True)
+    print(result)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from PIL import Image
+from tegan.container import create_container, extract_stream, list_streams, add_stream, remove_stream
+from tegan.core import HEADER_BITS
+
+@pytest.fixture
+def cover(tmp_path):
+    rng = np.random.default_rng(8)
+    img = Image.fromarray(rng.integers(0, 256, size=(120, 160), dtype=np.uint8), "P")
+    img.putpalette(rng.integers(0, 256, size=768, dtype=np.uint8).tolist())
+    path = tmp_path / "cover.bmp"
+    img.save(path)
+    return str(path)
+
+@pytest.mark.parametrize("bpp", [1, 2])
+def test_remove_then_add_reuses_freed_offset(cover, tmp_path, bpp):
+    stego = str(tmp_path / "stego.bmp")
+    streams = {"a": b"first stream " * 20, "b": b"second" * 30, "c": b"third stream" * 10}
+    entries = create_container(cover, stego, streams, dir_capacity=256, bits_per_pixel=bpp)
+    assert entries[0].offset_bits == HEADER_BITS + 256 * 8
+    for name, data in streams.items():
+        assert extract_stream(stego, name, bits_per_pixel=bpp) == data
+
+    freed = next(e for e in entries if e.name == "b")
+    remove_stream(stego, "b", bits_per_pixel=bpp)
+    assert [e.name for e in list_streams(stego, bits_per_pixel=bpp)] == ["a", "c"]
+    with pytest.raises(KeyError):
+        extract_stream(stego, "b", bits_per_pixel=bpp)
+
+    new = add_stream(stego, "d", b"fits into the hole", bits_per_pixel=bpp)
+    assert new.offset_bits == freed.offset_bits
+    assert extract_stream(stego, "d", bits_per_pixel=bpp) == b"fits into the hole"
+    for name in ("a", "c"):
+        assert extract_stream(stego, name, bits_per_pixel=bpp) == streams[name]
+
+def test_add_rejects_duplicate_and_oversized(cover, tmp_path):
+    stego = str(tmp_path / "stego.bmp")
+    create_container(cover, stego, {"a": b"x" * 10}, dir_capacity=64)
+    with pytest.raises(ValueError, match="уже есть"):
+        add_stream(stego, "a", b"y")
+    with pytest.raises(ValueError, match="Нет свободного места"):
+        add_stream(stego, "big", b"z" * (120 * 160 // 8))
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+from PIL import Image
+from tegan.core import embed_palette_lsb, extract_palette_lsb
+from tegan.tables import TableStore
+
+@pytest.fixture
+def three_colors(tmp_path):
+    img = Image.fromarray(np.random.default_rng(0).integers(0, 3, size=(64, 64), dtype=np.uint8), "P")
+    img.putpalette([255, 0, 0, 0, 255, 0, 0, 0, 255])
+    path = tmp_path / "cover.bmp"
+    img.save(path)
+    return str(path)
+
+@pytest.mark.parametrize("store", [False, True])
+def test_embed_rejects_palette_without_some_residue(three_colors, tmp_path, store):
+    tables = TableStore(str(tmp_path / "tables")) if store else None
+    stego = str(tmp_path / "stego.bmp")
+    with pytest.raises(ValueError, match="остатком"):
+        embed_palette_lsb(three_colors, stego, b"hello", bits_per_pixel=2, tables=tables)
+    embed_palette_lsb(three_colors, stego, b"hello", tables=tables)
+    assert extract_palette_lsb(stego, tables=tables) == b"hello"
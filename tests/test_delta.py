@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from PIL import Image
+from tegan.delta import make_delta, apply_delta, delta_info, _varint_encode, _varint_decode, DELTA_HEAD
+
+def _save(path, plane, palette):
+    img = Image.fromarray(plane, "P")
+    img.putpalette(palette)
+    img.save(path)
+    return str(path)
+
+@pytest.fixture
+def cover(tmp_path):
+    rng = np.random.default_rng(7)
+    palette = rng.integers(0, 256, size=768, dtype=np.uint8).tolist()
+    plane = rng.integers(0, 256, size=(40, 60), dtype=np.uint8)
+    return _save(tmp_path / "cover.bmp", plane, palette), plane, palette
+
+def test_varint_round_trip():
+    values = np.array([0, 1, 127, 128, 300, 2 ** 35, 2 ** 63 - 1], dtype=np.uint64)
+    assert _varint_decode(_varint_encode(values), len(values)).tolist() == values.astype(np.int64).tolist()
+
+def test_empty_delta(cover, tmp_path):
+    path, plane, palette = cover
+    same = _save(tmp_path / "same.bmp", plane, palette)
+    delta = make_delta(path, same)
+    assert len(delta) == DELTA_HEAD.size
+    assert delta_info(delta)["runs"] == 0
+    out = str(tmp_path / "out.bmp")
+    assert apply_delta(path, delta, out) == 0
+    assert np.array_equal(np.asarray(Image.open(out)), plane)
+
+def test_multi_run_round_trip(cover, tmp_path):
+    path, plane, palette = cover
+    stego = plane.copy().reshape(-1)
+    # серии в начале, посередине, одиночный пиксель и в самом конце
+    for lo, hi in ((0, 5), (200, 1000), (1500, 1501), (stego.size - 3, stego.size)):
+        stego[lo:hi] ^= 1
+    stego_path = _save(tmp_path / "stego.bmp", stego.reshape(plane.shape), palette)
+    delta = make_delta(path, stego_path)
+    info = delta_info(delta)
+    assert (info["runs"], info["pixels_changed"]) == (4, 5 + 800 + 1 + 3)
+    out = str(tmp_path / "out.bmp")
+    assert apply_delta(path, delta, out) == info["pixels_changed"]
+    assert np.array_equal(np.asarray(Image.open(out)).reshape(-1), stego)
+
+def test_delta_rejects_other_cover(cover, tmp_path):
+    path, plane, palette = cover
+    stego = plane.copy()
+    stego[0, 0] ^= 1
+    delta = make_delta(path, _save(tmp_path / "stego.bmp", stego, palette))
+    other = plane.copy()
+    other[-1, -1] ^= 1
+    with pytest.raises(ValueError, match="другой обложки"):
+        apply_delta(_save(tmp_path / "other.bmp", other, palette), delta, str(tmp_path / "out.bmp"))
+    with pytest.raises(ValueError, match="сигнатура"):
+        apply_delta(path, b"XXXX" + delta[4:], str(tmp_path / "out.bmp"))
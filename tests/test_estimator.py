@@ -0,0 +1,36 @@
+import os
+import numpy as np
+import pytest
+from PIL import Image
+from tegan.core import embed_palette_lsb, measure_distortion
+from tegan.estimator import estimate, index_histogram
+
+@pytest.fixture
+def split_cover(tmp_path):
+    # верх и низ из разных половин палитры: оценка по всему изображению здесь промахивается
+    rng = np.random.default_rng(5)
+    plane = np.concatenate((rng.integers(0, 128, size=(40, 100)), rng.integers(128, 256, size=(60, 100))))
+    img = Image.fromarray(plane.astype(np.uint8), "P")
+    img.putpalette(np.concatenate((rng.integers(0, 64, size=384), rng.integers(0, 256, size=384))).tolist())
+    path = tmp_path / "cover.bmp"
+    img.save(path)
+    return str(path)
+
+def test_histogram_prefix_matches_bincount(split_cover):
+    hist = index_histogram(split_cover)
+    flat = np.asarray(Image.open(split_cover)).reshape(-1)
+    assert np.array_equal(hist.counts, np.bincount(flat, minlength=256))
+    assert np.array_equal(hist.prefix_counts(3000), np.bincount(flat[:3000], minlength=256))
+
+def test_estimate_follows_touched_prefix(split_cover, tmp_path):
+    stego = str(tmp_path / "stego.bmp")
+    payload_len = 300
+    predicted = estimate(split_cover, payload_len)
+    measured = []
+    for _ in range(5):
+        embed_palette_lsb(split_cover, stego, os.urandom(payload_len))
+        measured.append(measure_distortion(split_cover, stego))
+    mean_de = np.mean([m["mean_delta_e"] for m in measured])
+    psnr = np.mean([m["psnr"] for m in measured])
+    assert predicted["mean_delta_e"] == pytest.approx(mean_de, rel=0.05)
+    assert predicted["psnr"] == pytest.approx(psnr, abs=0.5)
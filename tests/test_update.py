@@ -0,0 +1,55 @@
+import os
+import numpy as np
+import pytest
+from PIL import Image
+from tegan.core import embed_palette_lsb_nohdr, extract_palette_lsb_nohdr
+from tegan.update import update_palette_lsb_nohdr
+
+@pytest.fixture
+def stego(tmp_path):
+    rng = np.random.default_rng(6)
+    img = Image.fromarray(rng.integers(0, 256, size=(50, 70), dtype=np.uint8), "P")
+    img.putpalette(rng.integers(0, 256, size=768, dtype=np.uint8).tolist())
+    cover = str(tmp_path / "cover.bmp")
+    img.save(cover)
+    path = str(tmp_path / "stego.bmp")
+    embed_palette_lsb_nohdr(cover, path, b"old payload, old payload")
+    return path
+
+def _plane(path):
+    return np.asarray(Image.open(path)).reshape(-1)
+
+@pytest.mark.parametrize("bpp", [1, 2])
+def test_in_place_bmp_patch_matches_full_embed(stego, bpp):
+    new = b"new payload, new payload"
+    before = _plane(stego).copy()
+    changed = update_palette_lsb_nohdr(stego, new, bits_per_pixel=bpp)
+    assert extract_palette_lsb_nohdr(stego, len(new) * 8, bits_per_pixel=bpp) == new
+    assert changed == np.count_nonzero(_plane(stego) != before)
+
+def test_png_destination_is_rewritten_not_copied(stego, tmp_path):
+    dst = str(tmp_path / "out.png")
+    update_palette_lsb_nohdr(stego, b"png!", dst)
+    assert Image.open(dst).format == "PNG"
+    assert extract_palette_lsb_nohdr(dst, 32) == b"png!"
+    assert extract_palette_lsb_nohdr(stego, 32) != b"png!"  # исходник не тронут
+
+def test_png_source_falls_back_to_rewrite(stego, tmp_path):
+    src = str(tmp_path / "stego.png")
+    Image.open(stego).save(src)
+    update_palette_lsb_nohdr(src, b"again")
+    assert Image.open(src).format == "PNG"
+    assert extract_palette_lsb_nohdr(src, 40) == b"again"
+
+def test_offset_bits_leaves_prefix_alone(stego):
+    head = extract_palette_lsb_nohdr(stego, 64)
+    update_palette_lsb_nohdr(stego, b"tail", offset_bits=64)
+    assert extract_palette_lsb_nohdr(stego, 96) == head + b"tail"
+    with pytest.raises(ValueError, match="не кратно"):
+        update_palette_lsb_nohdr(stego, b"x", bits_per_pixel=2, offset_bits=3)
+
+def test_out_of_range_segment_leaves_no_copy(stego, tmp_path):
+    dst = str(tmp_path / "copy.bmp")
+    with pytest.raises(ValueError, match="емкость"):
+        update_palette_lsb_nohdr(stego, b"x" * 10, dst, offset_bits=50 * 70 - 8)
+    assert not os.path.exists(dst)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from PIL import Image
+from tegan.core import get_palette_rgb, lab_distance_matrix
+from tegan.wetpaper import (_pack_words, _syndromes, _solve, embed_wet_paper, extract_wet_paper,
+                            BLOCK)
+
+def _syndromes_slow(words, rows):
+    return np.array([[bin(int(w) & int(r)).count("1") & 1 for r in rows] for w in words], dtype=np.uint8)
+
+def test_syndromes_match_popcount():
+    rng = np.random.default_rng(1)
+    words = rng.integers(0, np.iinfo(np.uint64).max, size=50, dtype=np.uint64, endpoint=True)
+    rows = rng.integers(0, np.iinfo(np.uint64).max, size=20, dtype=np.uint64, endpoint=True)
+    assert np.array_equal(_syndromes(words, rows), _syndromes_slow(words, rows))
+
+def test_solve_round_trip_touches_only_dry():
+    rng = np.random.default_rng(2)
+    blocks, rate = 200, 24
+    rows = rng.integers(0, np.iinfo(np.uint64).max, size=rate, dtype=np.uint64, endpoint=True)
+    x = _pack_words(rng.integers(0, 2, size=(blocks, BLOCK)))
+    dry = _pack_words(rng.random((blocks, BLOCK)) < 0.7)
+    message = rng.integers(0, 2, size=(blocks, rate), dtype=np.uint8)
+    v, failed = _solve(dry, _syndromes(x, rows) ^ message, rows)
+    assert not failed.any()
+    assert not (v & ~dry).any()
+    assert np.array_equal(_syndromes(x ^ v, rows), message)
+
+def test_solve_reports_blocks_without_enough_dry_pixels():
+    rng = np.random.default_rng(3)
+    rows = rng.integers(0, np.iinfo(np.uint64).max, size=32, dtype=np.uint64, endpoint=True)
+    dry = np.array([np.uint64(0b1111), np.iinfo(np.uint64).max], dtype=np.uint64)  # 4 сухих против 64
+    rhs = np.ones((2, 32), dtype=np.uint8)
+    _, failed = _solve(dry, rhs, rows)
+    assert failed.tolist() == [True, False]
+
+@pytest.fixture
+def cover(tmp_path):
+    rng = np.random.default_rng(4)
+    img = Image.fromarray(rng.integers(0, 256, size=(120, 160), dtype=np.uint8), "P")
+    img.putpalette(rng.integers(0, 256, size=768, dtype=np.uint8).tolist())
+    path = tmp_path / "cover.bmp"
+    img.save(path)
+    return str(path)
+
+def test_embed_round_trip_respects_max_cost(cover, tmp_path):
+    payload = bytes(range(256)) * 4
+    stego = str(tmp_path / "stego.bmp")
+    max_cost = 12.0
+    changed = embed_wet_paper(cover, stego, payload, max_cost, key=5)
+    assert extract_wet_paper(stego, key=5) == payload
+
+    a = np.asarray(Image.open(cover)).reshape(-1)
+    b = np.asarray(Image.open(stego)).reshape(-1)
+    moved = a != b
+    assert moved.sum() == changed
+    dist = lab_distance_matrix(get_palette_rgb(Image.open(cover)))
+    assert dist[a[moved], b[moved]].max() <= max_cost
+
+def test_embed_fails_when_everything_is_wet(cover, tmp_path):
+    with pytest.raises(ValueError, match="сухих пикселей"):
+        embed_wet_paper(cover, str(tmp_path / "stego.bmp"), b"x" * 100, max_cost=0.0)
+
+def test_embed_checks_declared_length(cover, tmp_path):
+    stego = str(tmp_path / "stego.bmp")
+    with pytest.raises(ValueError, match="длиннее"):
+        embed_wet_paper(cover, stego, b"x" * 100, max_cost=12.0, payload_len=50)
+    with pytest.raises(ValueError, match="короче"):
+        embed_wet_paper(cover, stego, b"x" * 100, max_cost=12.0, payload_len=150)